@@ -1,9 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk
+from PIL import Image, ImageDraw, ImageTk
 import time
 import os
+import queue
 import sys
+import threading
+from collections import deque
 
 # Determine correct base path for BOTH normal Python AND PyInstaller EXE
 if getattr(sys, 'frozen', False):
@@ -19,9 +22,12 @@ DATA_PATH = os.path.join(BASE_PATH, "data")
 # Import solver after BASE_PATH/DATA_PATH is defined (no dependency, but keep ordering predictable)
 from sokoban_solverf import (
     parse_level,
-    astar_push_move_optimal_improved,
+    anytime_push_search,
+    anytime_search,
     DIR_MAP,
 )
+from sokoban_cache import SolutionCache
+from sokoban_levels import LevelCollection
 
 # Asset filenames resolved using DATA_PATH
 PLAYER_PNG = os.path.join(DATA_PATH, "retro_player.png")
@@ -31,12 +37,105 @@ WALL_PNG = os.path.join(DATA_PATH, "retro_wall.png")
 TARGET_PNG = os.path.join(DATA_PATH, "retro_target.png")
 
 CELL = 64
-
-def animate_move(canvas, item, dx, dy, steps=8, delay=0.01):
-    for _ in range(steps):
-        canvas.move(item, dx / steps, dy / steps)
-        canvas.update()
-        time.sleep(delay)
+SOLVER_MAX_EXPANSIONS = 2_000_000
+SOLVER_POLL_MS = 100
+
+# Move history: one byte per move, the direction's index in MOVE_LETTERS plus
+# PUSH_FLAG when a box was pushed. Undo and redo replay these deltas.
+MOVE_LETTERS = "UDLR"
+PUSH_FLAG = 4
+
+def lurd_rle(history):
+    # Standard LURD notation (lowercase walk, uppercase push), run-length
+    # encoded: "3rU" is r, r, r, U.
+    out = []
+    i = 0
+    while i < len(history):
+        j = i
+        while j < len(history) and history[j] == history[i]:
+            j += 1
+        code = history[i]
+        letter = MOVE_LETTERS[code & 3]
+        letter = letter if code & PUSH_FLAG else letter.lower()
+        out.append(f"{j - i}{letter}" if j - i > 1 else letter)
+        i = j
+    return "".join(out)
+
+ANIM_MOVE_MS = 80
+ANIM_FRAME_MS = 16
+PLAYBACK_SPEEDS = (1, 2, 4, 8, 16)
+
+class Animator:
+    # Frame-based tweening on the Tk event loop. A tween moves a few canvas
+    # items to target coordinates over duration_ms / speed; frames come from
+    # after(), so input is never blocked. Interpolation follows elapsed time,
+    # so slow frames skip ahead instead of stretching playback, and when
+    # several tweens fit into one frame they all complete in that frame.
+    def __init__(self, root):
+        self.root = root
+        self.speed = 1
+        self.pending = deque()
+        self.current = None
+        self.job = None
+
+    def animate(self, canvas, targets, duration_ms=ANIM_MOVE_MS, on_done=None):
+        # targets: [(item, x, y), ...]; on_done runs once the items arrive.
+        self.pending.append((canvas, targets, duration_ms, on_done))
+        if self.job is None:
+            self.job = self.root.after_idle(self.frame)
+
+    def frame(self):
+        now = time.perf_counter()
+        carry = None
+        while True:
+            if self.current is None:
+                if not self.pending:
+                    break
+                canvas, targets, duration_ms, on_done = self.pending.popleft()
+                starts = [(item, *canvas.coords(item)[:2], x, y) for item, x, y in targets]
+                t0 = now if carry is None else carry
+                self.current = (canvas, starts, t0, duration_ms / 1000 / self.speed, on_done)
+            canvas, starts, t0, duration, on_done = self.current
+            t = 1.0 if duration <= 0 else min(1.0, (now - t0) / duration)
+            for item, x0, y0, x1, y1 in starts:
+                canvas.coords(item, x0 + (x1 - x0) * t, y0 + (y1 - y0) * t)
+            if t < 1.0:
+                break
+            carry = t0 + duration
+            self.current = None
+            if on_done:
+                on_done()
+
+        if self.current is None and not self.pending:
+            self.job = None
+            return
+        spent = (time.perf_counter() - now) * 1000
+        self.job = self.root.after(max(1, int(ANIM_FRAME_MS - spent)), self.frame)
+
+    def finish(self):
+        # Jump every queued tween to its end, running callbacks in order.
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+        while self.current is not None or self.pending:
+            if self.current is None:
+                canvas, targets, _, on_done = self.pending.popleft()
+            else:
+                canvas, starts, _, _, on_done = self.current
+                targets = [(item, x, y) for item, _, _, x, y in starts]
+                self.current = None
+            for item, x, y in targets:
+                canvas.coords(item, x, y)
+            if on_done:
+                on_done()
+
+    def cancel(self):
+        # Drop everything without touching the canvas (it may be gone).
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+        self.current = None
+        self.pending.clear()
 
 
 class SokobanGUI:
@@ -54,8 +153,10 @@ class SokobanGUI:
             self.tex_player = ImageTk.PhotoImage(Image.open(PLAYER_PNG).resize((CELL, CELL), Image.NEAREST))
             self.tex_box = ImageTk.PhotoImage(Image.open(BOX_PNG).resize((CELL, CELL), Image.NEAREST))
             self.tex_box_goal = ImageTk.PhotoImage(Image.open(BOX_GOAL_PNG).resize((CELL, CELL), Image.NEAREST))
-            self.tex_wall = ImageTk.PhotoImage(Image.open(WALL_PNG).resize((CELL, CELL), Image.NEAREST))
-            self.tex_target = ImageTk.PhotoImage(Image.open(TARGET_PNG).resize((CELL, CELL), Image.NEAREST))
+            # Walls and targets only ever appear in the composited background,
+            # so they stay PIL images.
+            self.img_wall = Image.open(WALL_PNG).resize((CELL, CELL), Image.NEAREST).convert("RGBA")
+            self.img_target = Image.open(TARGET_PNG).resize((CELL, CELL), Image.NEAREST).convert("RGBA")
         except Exception as e:
             messagebox.showerror("Asset Load Error", f"Failed to load one or more image assets.\n\n{e}")
             raise
@@ -70,14 +171,27 @@ class SokobanGUI:
 
         self.level_list = tk.Listbox(self.side, width=18, height=10, font=("Consolas", 12))
         self.level_list.pack(pady=4)
-        for i in range(len(levels)):
-            self.level_list.insert(tk.END, f"Level {i+1}")
+        # A LevelCollection names its levels from the file's titles; the list
+        # is filled in one call so collections with thousands of levels open fast.
+        if isinstance(levels, LevelCollection):
+            self.level_list.insert(tk.END, *levels.names)
+        else:
+            self.level_list.insert(tk.END, *[f"Level {i+1}" for i in range(len(levels))])
         self.level_list.bind("<<ListboxSelect>>", self.on_level_select)
 
         ttk.Button(self.side, text="Load", command=self.load_selected_level).pack(pady=6)
-        ttk.Button(self.side, text="Solve", command=self.solve).pack(pady=6)
+        self.solve_button = ttk.Button(self.side, text="Solve", command=self.solve)
+        self.solve_button.pack(pady=6)
+        self.cancel_button = ttk.Button(self.side, text="Cancel", command=self.cancel_solve, state="disabled")
+        self.cancel_button.pack(pady=6)
         ttk.Button(self.side, text="Step", command=self.step).pack(pady=6)
         ttk.Button(self.side, text="Auto", command=self.auto_play).pack(pady=6)
+        ttk.Button(self.side, text="Skip", command=self.skip_to_end).pack(pady=6)
+        self.speed_box = ttk.Combobox(self.side, width=6, state="readonly",
+                                      values=[f"{s}x" for s in PLAYBACK_SPEEDS])
+        self.speed_box.current(0)
+        self.speed_box.bind("<<ComboboxSelected>>", self.on_speed_select)
+        self.speed_box.pack(pady=6)
         ttk.Button(self.side, text="Reset", command=self.reset_level).pack(pady=6)
 
         arrow_frame = tk.Frame(self.side, bg="#fac800")
@@ -87,22 +201,49 @@ class SokobanGUI:
         ttk.Button(arrow_frame, text="→", width=4, command=lambda: self.try_move("R")).grid(row=1, column=2)
         ttk.Button(arrow_frame, text="↓", width=4, command=lambda: self.try_move("D")).grid(row=2, column=1)
 
-        ttk.Button(self.side, text="Undo", command=self.undo).pack(pady=6)
+        undo_frame = tk.Frame(self.side, bg="#fac800")
+        undo_frame.pack(pady=6)
+        ttk.Button(undo_frame, text="Undo", width=6, command=self.undo).grid(row=0, column=0)
+        ttk.Button(undo_frame, text="Redo", width=6, command=self.redo).grid(row=0, column=1)
+        ttk.Button(self.side, text="Export", command=self.export_moves).pack(pady=6)
 
         self.move_label = tk.Label(self.side, text="Moves: 0/0", bg="#fac800", font=("Consolas", 12))
         self.move_label.pack(pady=8)
 
+        self.solver_label = tk.Label(self.side, text="", bg="#fac800", font=("Consolas", 10), justify="left")
+        self.solver_label.pack(pady=4)
+
         self.canvas = None
 
-        self.wall_items = {}
-        self.target_items = {}
+        self.background = None
         self.box_items = {}
         self.player_item = None
 
-        self.move_history = []
+        self.move_history = bytearray()
+        self.redo_history = bytearray()
         self.moves = []
         self.move_index = 0
 
+        self.animator = Animator(root)
+        self.playing = False
+
+        # Background solve: the search runs on a worker thread against a
+        # snapshot of the position and talks back through solver_queue, which
+        # poll_solver drains from the Tk loop. solver_poll is the pending
+        # after() id, cancelled with the solve so stale polls never run.
+        self.solver_thread = None
+        self.solver_cancel = None
+        self.solver_queue = queue.Queue()
+        self.solver_snapshot = None
+        self.solver_best = None
+        self.solver_poll = None
+        # Solutions persist across sessions; without a writable cache file the
+        # GUI just solves every time.
+        try:
+            self.solution_cache = SolutionCache()
+        except Exception:
+            self.solution_cache = None
+
         self.load_level(0)
 
     def on_key(self, event):
@@ -112,6 +253,8 @@ class SokobanGUI:
             self.try_move(km[key])
         elif key == "z" and (event.state & 0x4):
             self.undo()
+        elif key == "y" and (event.state & 0x4):
+            self.redo()
 
     def on_level_select(self, event):
         sel = self.level_list.curselection()
@@ -123,31 +266,40 @@ class SokobanGUI:
         if sel:
             self.load_level(sel[0])
 
+    def on_speed_select(self, event):
+        self.animator.speed = PLAYBACK_SPEEDS[self.speed_box.current()]
+
     def load_level(self, index):
+        self.cancel_solve()
+        self.playing = False
+        self.animator.cancel()
         self.current_level_index = index
         lines = self.levels[index]
-        walls, goals, boxes, player = parse_level(lines)
+        if isinstance(self.levels, LevelCollection):
+            walls, goals, boxes, player = self.levels.parsed(index)
+        else:
+            walls, goals, boxes, player = parse_level(lines)
 
         self.walls = set(walls)
         self.goals = set(goals)
         self.boxes = set(boxes)
         self.player = player
 
+        self.start_player = player
+        self.start_boxes = frozenset(boxes)
+
         self.rows = len(lines)
         self.cols = max(len(r) for r in lines)
 
-        if self.canvas:
-            self.canvas.destroy()
+        if self.canvas is None:
+            self.canvas = tk.Canvas(self.main, bg="#222222", highlightthickness=0)
+            self.canvas.pack()
+        self.canvas.config(width=self.cols * CELL, height=self.rows * CELL)
 
-        self.canvas = tk.Canvas(self.main, width=self.cols * CELL, height=self.rows * CELL,
-                                bg="#222222", highlightthickness=0)
-        self.canvas.pack()
-
-        self.wall_items.clear()
-        self.target_items.clear()
         self.box_items.clear()
 
-        self.move_history = []
+        self.move_history = bytearray()
+        self.redo_history = bytearray()
         self.moves = []
         self.move_index = 0
 
@@ -155,19 +307,12 @@ class SokobanGUI:
         self.update_moves_label()
 
     def draw_level(self):
+        # Built once per level: floor, walls and targets never change, so they
+        # are composited into one background image; only the box and player
+        # items are touched afterwards (see sync_sprites).
         self.canvas.delete("all")
-        for r in range(self.rows):
-            for c in range(self.cols):
-                x, y = c * CELL, r * CELL
-                self.canvas.create_rectangle(x, y, x + CELL, y + CELL, fill="#eaeaea", outline="#bdbdbd")
-
-        for (r, c) in self.walls:
-            x, y = c * CELL, r * CELL
-            self.wall_items[(r, c)] = self.canvas.create_image(x, y, anchor="nw", image=self.tex_wall)
-
-        for (r, c) in self.goals:
-            x, y = c * CELL, r * CELL
-            self.target_items[(r, c)] = self.canvas.create_image(x, y, anchor="nw", image=self.tex_target)
+        self.background = ImageTk.PhotoImage(self.render_background())
+        self.canvas.create_image(0, 0, anchor="nw", image=self.background)
 
         for (r, c) in self.boxes:
             x, y = c * CELL, r * CELL
@@ -179,6 +324,34 @@ class SokobanGUI:
 
         self.check_win()
 
+    def render_background(self):
+        bg = Image.new("RGBA", (self.cols * CELL, self.rows * CELL), "#222222")
+        draw = ImageDraw.Draw(bg)
+        for r in range(self.rows):
+            for c in range(self.cols):
+                x, y = c * CELL, r * CELL
+                draw.rectangle((x, y, x + CELL, y + CELL), fill="#eaeaea", outline="#bdbdbd")
+        for (r, c) in self.walls:
+            bg.alpha_composite(self.img_wall, (c * CELL, r * CELL))
+        for (r, c) in self.goals:
+            bg.alpha_composite(self.img_target, (c * CELL, r * CELL))
+        return bg
+
+    def sync_sprites(self):
+        # Move only the box items whose cell no longer holds a box onto the
+        # cells that gained one; boxes are interchangeable, so any pairing works.
+        vacated = [cell for cell in self.box_items if cell not in self.boxes]
+        filled = [cell for cell in self.boxes if cell not in self.box_items]
+        for old, new in zip(vacated, filled):
+            item = self.box_items.pop(old)
+            r, c = new
+            self.canvas.coords(item, c * CELL, r * CELL)
+            self.canvas.itemconfig(item, image=self.tex_box_goal if new in self.goals else self.tex_box)
+            self.box_items[new] = item
+
+        pr, pc = self.player
+        self.canvas.coords(self.player_item, pc * CELL, pr * CELL)
+
     def try_move(self, mv):
         dr, dc = DIR_MAP[mv]
         pr, pc = self.player
@@ -188,102 +361,307 @@ class SokobanGUI:
         if dest in self.walls:
             return
 
-        pushing_box = dest in self.boxes
-        self.move_history.append((self.player, set(self.boxes)))
+        # Manual input takes over: stop playback and land any running tween.
+        self.playing = False
+        self.animator.finish()
 
+        pushing_box = dest in self.boxes
         if pushing_box:
             br, bc = nr + dr, nc + dc
             box_dest = (br, bc)
             if box_dest in self.walls or box_dest in self.boxes:
-                self.move_history.pop()
                 return
 
             box_id = self.box_items.pop(dest)
-            animate_move(self.canvas, box_id, dc * CELL, dr * CELL)
             self.boxes.remove(dest)
             self.boxes.add(box_dest)
             new_img = self.tex_box_goal if box_dest in self.goals else self.tex_box
             self.canvas.itemconfig(box_id, image=new_img)
             self.box_items[box_dest] = box_id
 
-        animate_move(self.canvas, self.player_item, dc * CELL, dr * CELL)
         self.player = dest
+        self.record(mv, pushing_box)
+        self.move_sprites(box_dest if pushing_box else None, on_done=self.check_win)
 
         self.move_index += 1  # correct for manual play
         self.update_moves_label()
-        self.check_win()
 
-    def apply(self, mv):
+    def apply(self, mv, on_done=None, animate=True, keep_redo=False):
+        # State changes at once; only the sprites trail behind.
         dr, dc = DIR_MAP[mv]
         pr, pc = self.player
         nr, nc = pr + dr, pc + dc
         dest = (nr, nc)
 
-        self.move_history.append((self.player, set(self.boxes)))
-
+        box_dest = None
         if dest in self.boxes:
-            br, bc = nr + dr, nc + dc
+            box_dest = (nr + dr, nc + dc)
             box_id = self.box_items.pop(dest)
-            animate_move(self.canvas, box_id, dc * CELL, dr * CELL)
             self.boxes.remove(dest)
-            self.boxes.add((br, bc))
-            new_img = self.tex_box_goal if (br, bc) in self.goals else self.tex_box
+            self.boxes.add(box_dest)
+            new_img = self.tex_box_goal if box_dest in self.goals else self.tex_box
             self.canvas.itemconfig(box_id, image=new_img)
-            self.box_items[(br, bc)] = box_id
+            self.box_items[box_dest] = box_id
 
-        animate_move(self.canvas, self.player_item, dc * CELL, dr * CELL)
         self.player = dest
+        self.record(mv, box_dest is not None, keep_redo)
+        if animate:
+            self.move_sprites(box_dest, on_done=on_done)
+        else:
+            self.place_sprites(box_dest)
 
         self.move_index += 1  # solver move count
-        self.check_win()
+
+    def record(self, mv, pushed, keep_redo=False):
+        self.move_history.append(MOVE_LETTERS.index(mv) | (PUSH_FLAG if pushed else 0))
+        if not keep_redo:
+            self.redo_history.clear()
+
+    def sprite_targets(self, box_dest):
+        pr, pc = self.player
+        targets = [(self.player_item, pc * CELL, pr * CELL)]
+        if box_dest is not None:
+            br, bc = box_dest
+            targets.append((self.box_items[box_dest], bc * CELL, br * CELL))
+        return targets
+
+    def move_sprites(self, box_dest, on_done=None):
+        self.animator.animate(self.canvas, self.sprite_targets(box_dest), on_done=on_done)
+
+    def place_sprites(self, box_dest):
+        for item, x, y in self.sprite_targets(box_dest):
+            self.canvas.coords(item, x, y)
 
     def undo(self):
         if not self.move_history:
             return
 
-        prev_player, prev_boxes = self.move_history.pop()
-        self.player = prev_player
-        self.boxes = set(prev_boxes)
+        self.playing = False
+        self.animator.finish()
+        code = self.move_history.pop()
+        self.redo_history.append(code)
 
-        self.draw_level()
+        # Inverse delta: step the player back, and pull the pushed box (if
+        # any) from in front of the player onto the player's old cell.
+        dr, dc = DIR_MAP[MOVE_LETTERS[code & 3]]
+        pr, pc = self.player
+        if code & PUSH_FLAG:
+            box = (pr + dr, pc + dc)
+            box_id = self.box_items.pop(box)
+            self.boxes.remove(box)
+            self.boxes.add(self.player)
+            self.box_items[self.player] = box_id
+            self.canvas.coords(box_id, pc * CELL, pr * CELL)
+            self.canvas.itemconfig(box_id, image=self.tex_box_goal if self.player in self.goals else self.tex_box)
+        self.player = (pr - dr, pc - dc)
+        self.canvas.coords(self.player_item, (pc - dc) * CELL, (pr - dr) * CELL)
 
         if self.move_index > 0:
             self.move_index -= 1
 
         self.update_moves_label()
 
+    def redo(self):
+        if not self.redo_history:
+            return
+
+        self.playing = False
+        self.animator.finish()
+        code = self.redo_history.pop()
+        self.apply(MOVE_LETTERS[code & 3], animate=False, keep_redo=True)
+        self.update_moves_label()
+        self.check_win()
+
+    def export_moves(self):
+        if not self.move_history:
+            return
+        text = lurd_rle(self.move_history)
+        self.root.clipboard_clear()
+        self.root.clipboard_append(text)
+        messagebox.showinfo("Export", f"Moves copied to clipboard ({len(self.move_history)} moves):\n\n{text}")
+
     def solve(self):
-        res = astar_push_move_optimal_improved(
-            self.walls,
-            self.goals,
-            frozenset(self.boxes),
-            self.player,
-            max_expansions=2_000_000
+        if self.solver_thread is not None:
+            return
+        snapshot = (self.current_level_index, self.player, frozenset(self.boxes))
+        cancel = threading.Event()
+        self.solver_snapshot = snapshot
+        self.solver_cancel = cancel
+        self.solver_best = None
+        self.solver_thread = threading.Thread(
+            target=self.solve_worker,
+            args=(frozenset(self.walls), frozenset(self.goals), snapshot, cancel),
+            daemon=True,
         )
+        self.solve_button.state(["disabled"])
+        self.cancel_button.state(["!disabled"])
+        self.solver_label.config(text="Solving...")
+        self.solver_thread.start()
+        self.solver_poll = self.root.after(SOLVER_POLL_MS, self.poll_solver)
+
+    def solve_worker(self, walls, goals, snapshot, cancel):
+        # Runs off the Tk thread: never touch widgets here. The anytime search
+        # posts every improved solution as it turns up, so the first one is
+        # playable long before the optimum is proven.
+        _, player, boxes = snapshot
+
+        def report(stats):
+            self.solver_queue.put(("progress", snapshot, stats))
+            return cancel.is_set()
+
+        def found(result):
+            self.solver_queue.put(("solution", snapshot, result))
+
+        try:
+            cache = self.solution_cache
+            if cache is not None:
+                board = cache.board(walls, goals, set(boxes) | {player})
+                cells = tuple(board.index(b) for b in boxes)
+                res = cache.get(board, cells, board.index(player))
+                if res is None:
+                    res = anytime_search(board, cells, board.index(player), on_solution=found,
+                                         max_expansions=SOLVER_MAX_EXPANSIONS, progress=report)
+                    # Only proven optima go into the cache.
+                    if res is not None and res["optimal"]:
+                        cache.put(board, cells, board.index(player), res)
+            else:
+                res = anytime_push_search(walls, goals, boxes, player, on_solution=found,
+                                          max_expansions=SOLVER_MAX_EXPANSIONS, progress=report)
+        except Exception as e:
+            self.solver_queue.put(("error", snapshot, e))
+            return
+        self.solver_queue.put(("cancelled" if cancel.is_set() else "done", snapshot, res))
 
-        if res is None:
+    def poll_solver(self):
+        self.solver_poll = None
+        finished = None
+        try:
+            while True:
+                kind, snapshot, payload = self.solver_queue.get_nowait()
+                if snapshot is not self.solver_snapshot:
+                    continue
+                if kind == "progress":
+                    rate = payload["expansions"] / payload["elapsed"] if payload["elapsed"] > 0 else 0
+                    best = self.solver_best
+                    self.solver_label.config(text=f"Solving... {payload['expansions']:,} exp\n"
+                                                  f"{rate:,.0f} exp/s, open {payload['open']:,}"
+                                                  + (f"\nbest so far: {best['g']} pushes" if best else ""))
+                elif kind == "solution":
+                    self.solver_best = payload
+                    loaded = self.load_solution(snapshot, payload)
+                    self.solver_label.config(text=f"Found {payload['g']} pushes, {len(payload['moves'])} moves"
+                                                  + ("\nlooking for better..." if loaded else
+                                                     "\n(board changed, not loaded)"))
+                else:
+                    finished = (kind, payload)
+        except queue.Empty:
+            pass
+
+        if finished is None:
+            if self.solver_thread is not None:
+                self.solver_poll = self.root.after(SOLVER_POLL_MS, self.poll_solver)
+            return
+        self.finish_solve(*finished)
+
+    def finish_solve(self, kind, payload):
+        snapshot = self.solver_snapshot
+        best = self.solver_best
+        self.solver_thread = None
+        self.solver_cancel = None
+        self.solver_snapshot = None
+        self.solver_best = None
+        if self.solver_poll is not None:
+            self.root.after_cancel(self.solver_poll)
+            self.solver_poll = None
+        self.solve_button.state(["!disabled"])
+        self.cancel_button.state(["disabled"])
+
+        if kind == "cancelled":
+            # Any solution already loaded stays playable.
+            self.solver_label.config(text="Solve cancelled." if best is None else
+                                     f"Cancelled; kept {best['g']} pushes.")
+            return
+        if kind == "error":
+            self.solver_label.config(text="")
+            messagebox.showerror("Solver", f"Solver failed:\n\n{payload}")
+            return
+        if payload is None:
+            self.solver_label.config(text="")
             messagebox.showerror("Solver", "No solution found (or exceeded max expansions).")
             return
+        if payload.get("cached"):
+            source = "cached"
+        else:
+            source = f"{payload['expansions']:,} exp" + ("" if payload.get("optimal", True) else ", not proven optimal")
+        self.solver_label.config(text=f"Solved: {payload['g']} pushes\n{source}")
+        if self.moves is payload["moves"]:
+            # Already loaded (and perhaps being played) when it was found.
+            return
+        # The player may have kept playing; the moves only fit the position
+        # the solve started from.
+        if not self.load_solution(snapshot, payload):
+            messagebox.showinfo("Solver", "The board changed while solving. Press Solve again for this position.")
+            return
+        messagebox.showinfo("Solver", f"Solution loaded — {len(self.moves)} moves.")
 
-        self.moves = res["moves"]
+    def load_solution(self, snapshot, result):
+        # Makes result playable from the start; False if the board has moved
+        # on from the position the solve started from.
+        if snapshot != (self.current_level_index, self.player, frozenset(self.boxes)):
+            return False
+        self.playing = False
+        self.animator.finish()
+        self.moves = result["moves"]
         self.move_index = 0
-        messagebox.showinfo("Solver", f"Solution loaded — {len(self.moves)} moves.")
         self.update_moves_label()
+        return True
+
+    def cancel_solve(self):
+        if self.solver_thread is None:
+            return
+        # The worker stops at its next progress report; its late messages are
+        # dropped because the snapshot no longer matches.
+        self.solver_cancel.set()
+        self.finish_solve("cancelled", None)
 
     def step(self):
         if not hasattr(self, "moves") or self.move_index >= len(self.moves):
             return
 
+        self.playing = False
+        self.animator.finish()
         mv = self.moves[self.move_index]
-        self.apply(mv)
+        self.apply(mv, on_done=self.check_win)
         self.update_moves_label()
 
     def auto_play(self):
-        if not hasattr(self, "moves"):
+        if not hasattr(self, "moves") or self.playing:
+            return
+        self.animator.finish()
+        self.playing = True
+        self.play_next()
+
+    def play_next(self):
+        # Chained from each tween's completion, so playback runs at the
+        # animator's pace and speed changes apply from the next move.
+        if not self.playing:
+            return
+        if self.move_index >= len(self.moves):
+            self.playing = False
+            self.check_win()
             return
-        if self.move_index < len(self.moves):
-            self.step()
-            self.canvas.after(120, self.auto_play)
+        self.apply(self.moves[self.move_index], on_done=self.play_next)
+        self.update_moves_label()
+
+    def skip_to_end(self):
+        if not hasattr(self, "moves") or self.move_index >= len(self.moves):
+            return
+        self.playing = False
+        self.animator.finish()
+        while self.move_index < len(self.moves):
+            self.apply(self.moves[self.move_index], animate=False)
+        self.update_moves_label()
+        self.check_win()
 
     def check_win(self):
         if all(box in self.goals for box in self.boxes):
@@ -296,7 +674,19 @@ class SokobanGUI:
         self.move_label.config(text=f"Moves: {self.move_index}/{total}")
 
     def reset_level(self):
-        self.load_level(self.current_level_index)
+        # Same as reloading the level, but the canvas and background are kept.
+        self.cancel_solve()
+        self.playing = False
+        self.animator.finish()
+        self.player = self.start_player
+        self.boxes = set(self.start_boxes)
+        self.sync_sprites()
+
+        self.move_history = bytearray()
+        self.redo_history = bytearray()
+        self.moves = []
+        self.move_index = 0
+        self.update_moves_label()
 
 
 LEVELS = [
@@ -357,8 +747,13 @@ if __name__ == "__main__":
         names = "\n".join(missing)
         raise FileNotFoundError(f"Required asset(s) not found. Expected at:\n{names}")
 
+    # Optional XSB/SOK collection to play instead of the built-in levels.
+    levels = LevelCollection(sys.argv[1]) if len(sys.argv) > 1 else LEVELS
+    if not levels:
+        raise SystemExit(f"No levels found in {sys.argv[1]}")
+
     root = tk.Tk()
-    gui = SokobanGUI(root, LEVELS)
+    gui = SokobanGUI(root, levels)
 
     root.update_idletasks()
     w = root.winfo_reqwidth()
@@ -0,0 +1,157 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from sokoban_cache import SolutionCache
+from sokoban_levels import LevelCollection
+from sokoban_solverf import parse_level, astar_push_move_optimal_improved, anytime_push_search
+
+def pattern_path(pattern_dir, lines):
+    # One learned-deadlock file per distinct level layout.
+    digest = hashlib.sha1("\n".join(lines).encode("utf-8")).hexdigest()
+    return os.path.join(pattern_dir, f"{digest}.json")
+
+def error_record(index, name, exc, wall=None):
+    return {"index": index, "name": name, "wall": wall, "status": "error", "error": f"{type(exc).__name__}: {exc}",
+            "moves": None, "g": None, "expansions": None}
+
+def solve_level(index, name, lines, max_expansions, time_limit, anytime=False, pattern_dir=None, cache_path=None):
+    # A level that fails to parse or solve is reported as status "error", so
+    # one bad level doesn't end the sweep.
+    t0 = time.perf_counter()
+    try:
+        result = run_solver(lines, max_expansions, time_limit, anytime, pattern_dir, cache_path)
+    except Exception as exc:
+        return error_record(index, name, exc, round(time.perf_counter() - t0, 4))
+    wall = time.perf_counter() - t0
+    record = {"index": index, "name": name, "wall": round(wall, 4)}
+    if result is None:
+        timed_out = time_limit is not None and wall >= time_limit
+        record.update(status="timeout" if timed_out else "unsolved", moves=None, g=None, expansions=None)
+    else:
+        record.update(status="solved", moves="".join(result["moves"]), g=result["g"],
+                      expansions=result["expansions"], optimal=result.get("optimal", True),
+                      cached=result.get("cached", False))
+    return record
+
+def run_solver(lines, max_expansions, time_limit, anytime, pattern_dir, cache_path):
+    walls, goals, boxes, player = parse_level(lines)
+    if player is None:
+        raise ValueError("level has no player")
+    if anytime:
+        result = anytime_push_search(walls, goals, boxes, player,
+                                     max_expansions=max_expansions, time_limit=time_limit)
+    elif cache_path:
+        patterns_path = pattern_path(pattern_dir, lines) if pattern_dir else None
+        with SolutionCache(cache_path) as cache:
+            result = cache.solve(walls, goals, boxes, player, max_expansions=max_expansions, time_limit=time_limit,
+                                 patterns_path=patterns_path)
+    else:
+        patterns_path = pattern_path(pattern_dir, lines) if pattern_dir else None
+        result = astar_push_move_optimal_improved(walls, goals, boxes, player,
+                                                  max_expansions=max_expansions, time_limit=time_limit,
+                                                  patterns_path=patterns_path)
+    return result
+
+# Set in each pool worker: a shared flag per level index, raised by
+# tracked_solve as the level starts. Shared memory rather than a queue, so the
+# flag survives a worker killed straight after setting it.
+started_levels = None
+
+def init_worker(started):
+    global started_levels
+    started_levels = started
+
+def tracked_solve(index, *args):
+    started_levels[index] = 1
+    return solve_level(index, *args)
+
+def sweep(tasks, jobs, solve_args):
+    # Yields one record per (index, name, lines) task. When a worker dies the
+    # executor fails every unfinished future, so the pool is rebuilt: levels
+    # that never started are resubmitted, and those that had started are
+    # re-run one at a time in their own pool, where a second death pins the
+    # level that caused it.
+    ctx = multiprocessing.get_context()
+    todo = list(tasks)
+    isolate = []
+    while todo or isolate:
+        if isolate:
+            batch, workers = [isolate.pop(0)], 1
+        else:
+            batch, todo, workers = todo, [], jobs
+        started = ctx.RawArray("b", len(tasks))
+        done = set()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=init_worker,
+                                 initargs=(started,)) as pool:
+            futures = {pool.submit(tracked_solve, index, name, lines, *solve_args): (index, name)
+                       for index, name, lines in batch}
+            for fut in as_completed(futures):
+                try:
+                    record = fut.result()
+                except BrokenProcessPool:
+                    continue
+                except Exception as exc:
+                    record = error_record(*futures[fut], exc)
+                done.add(record["index"])
+                yield record
+        left = [task for task in batch if task[0] not in done]
+        if not left:
+            continue
+        ran = {index for index, _, _ in left if started[index]}
+        if len(batch) == 1 or not ran:
+            # Ran alone (or the pool died before starting anything): nothing
+            # else to blame.
+            for index, name, _ in left:
+                yield error_record(index, name, BrokenProcessPool("worker process died while solving this level"))
+            continue
+        isolate += [task for task in left if task[0] in ran]
+        todo = [task for task in left if task[0] not in ran] + todo
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Solve every level in XSB/SOK files headlessly, one JSON line per level.")
+    ap.add_argument("paths", nargs="+", help="level files or collections")
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="worker processes")
+    ap.add_argument("--max-expansions", type=int, default=2_000_000)
+    ap.add_argument("--time-limit", type=float, default=None, help="seconds per level")
+    ap.add_argument("--anytime", action="store_true",
+                    help="weighted search that keeps improving until the time limit; records 'optimal'")
+    ap.add_argument("--pattern-dir", default=None,
+                    help="load and save learned deadlock patterns per level in this directory "
+                         "(ignored with --anytime)")
+    ap.add_argument("--cache", default=None, metavar="FILE",
+                    help="SQLite solution cache shared across runs (ignored with --anytime)")
+    ap.add_argument("-o", "--output", default="-", help="JSON lines destination (default: stdout)")
+    args = ap.parse_args(argv)
+
+    if args.pattern_dir:
+        os.makedirs(args.pattern_dir, exist_ok=True)
+    tasks = []
+    for path in args.paths:
+        with LevelCollection(path) as levels:
+            for i in range(len(levels)):
+                tasks.append((len(tasks), levels.name(i), levels[i]))
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    solved = 0
+    t0 = time.perf_counter()
+    try:
+        for record in sweep(tasks, max(1, args.jobs), (args.max_expansions, args.time_limit, args.anytime,
+                                                       args.pattern_dir, args.cache)):
+            solved += record["status"] == "solved"
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{solved}/{len(tasks)} solved in {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+    return 0 if solved == len(tasks) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from sokoban_levels import LevelCollection
+from sokoban_solverf import parse_level, astar_push_move_optimal_improved
+
+# Fixed-corpus benchmark: every level is solved in its own fresh process (so
+# peak RSS is per level), serially (so levels don't compete for cores), and
+# the best wall time of --repeat runs is kept. Results can be saved as a JSON
+# baseline and later runs compared against it; anything that got worse by
+# more than --threshold is flagged and the exit status is 1.
+
+BENCH_VERSION = 1
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels", "bench.xsb")
+# Wall-time differences below this many seconds are noise, whatever the ratio.
+MIN_WALL_DELTA = 0.05
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere.
+    return round(peak / (1 << 20) if sys.platform == "darwin" else peak / 1024, 1)
+
+def bench_level(lines, max_expansions, time_limit):
+    walls, goals, boxes, player = parse_level(lines)
+    peak_open = [0]
+    last = {}
+
+    def progress(stats):
+        # The search reports once more when it gives up, so the last stats
+        # hold an unsolved run's full expansion count.
+        peak_open[0] = max(peak_open[0], stats["open"])
+        last.update(stats)
+
+    t0 = time.perf_counter()
+    result = astar_push_move_optimal_improved(walls, goals, boxes, player, max_expansions=max_expansions,
+                                              time_limit=time_limit, progress=progress)
+    wall = time.perf_counter() - t0
+    record = {"wall": round(wall, 4), "peak_rss_mb": peak_rss_mb(), "peak_open": peak_open[0]}
+    if result is None:
+        expansions = last.get("expansions", 0)
+        record.update(status="unsolved", pushes=None, moves=None)
+    else:
+        # The open list rarely shrinks, so its final size stands in for the
+        # peak on levels too short for a progress sample.
+        expansions = result["expansions"]
+        record["peak_open"] = max(peak_open[0], result["open"])
+        record.update(status="solved", pushes=result["g"], moves=len(result["moves"]))
+    record.update(expansions=expansions, exp_per_sec=round(expansions / wall) if wall > 0 else None)
+    return record
+
+def run_corpus(levels, max_expansions, time_limit, repeat=1):
+    # levels: [(name, lines)]; yields (name, record) as each level finishes.
+    ctx = multiprocessing.get_context()
+    with ctx.Pool(1, maxtasksperchild=1) as pool:
+        for name, lines in levels:
+            runs = [pool.apply(bench_level, (lines, max_expansions, time_limit)) for _ in range(max(1, repeat))]
+            best = min(runs, key=lambda r: r["wall"])
+            best["peak_rss_mb"] = max((r["peak_rss_mb"] for r in runs if r["peak_rss_mb"] is not None),
+                                      default=None)
+            yield name, best
+
+def compare(record, base, threshold):
+    # Returns a list of human-readable regressions of record against base.
+    problems = []
+    if base["status"] == "solved" and record["status"] != "solved":
+        return ["no longer solved"]
+    if record["status"] != "solved" or base["status"] != "solved":
+        return problems
+    if record["pushes"] > base["pushes"]:
+        problems.append(f"pushes {base['pushes']} -> {record['pushes']}")
+    for field in ("wall", "expansions", "peak_rss_mb"):
+        old, new = base.get(field), record.get(field)
+        if old is None or new is None or new <= old * (1 + threshold):
+            continue
+        if field == "wall" and new - old < MIN_WALL_DELTA:
+            continue
+        problems.append(f"{field} {old} -> {new} (+{(new / old - 1) * 100 if old else float('inf'):.0f}%)")
+    return problems
+
+def load_corpus(paths):
+    levels = []
+    seen = set()
+    for path in paths:
+        with LevelCollection(path) as collection:
+            for i in range(len(collection)):
+                name = collection.name(i)
+                # Baselines are keyed by name, so duplicates get a suffix.
+                key, n = name, 2
+                while key in seen:
+                    key, n = f"{name} ({n})", n + 1
+                seen.add(key)
+                levels.append((key, collection[i]))
+    return levels
+
+def format_row(name, record):
+    def fmt(value, spec=""):
+        return "-" if value is None else format(value, spec)
+    return (f"{name[:24]:<24} {record['status']:<8} {fmt(record['pushes']):>6} {fmt(record['moves']):>6} "
+            f"{fmt(record['expansions'], ','):>10} {record['wall']:>8.3f} {fmt(record['exp_per_sec'], ','):>9} "
+            f"{fmt(record['peak_rss_mb']):>8} {record['peak_open']:>9,}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the A* solver over a fixed level corpus.")
+    ap.add_argument("paths", nargs="*", default=[DEFAULT_CORPUS], help="XSB/SOK corpus files (default: bundled)")
+    ap.add_argument("--max-expansions", type=int, default=500_000)
+    ap.add_argument("--time-limit", type=float, default=60, help="seconds per level")
+    ap.add_argument("--repeat", type=int, default=1, help="runs per level; the fastest is kept")
+    ap.add_argument("--save", metavar="FILE", help="write the results as a JSON baseline")
+    ap.add_argument("--baseline", metavar="FILE", help="compare against a saved baseline")
+    ap.add_argument("--threshold", type=float, default=0.10,
+                    help="relative slowdown/growth that counts as a regression (default 0.10)")
+    args = ap.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        if baseline.get("version") != BENCH_VERSION:
+            raise SystemExit(f"{args.baseline}: unsupported baseline version {baseline.get('version')}")
+
+    print(f"{'level':<24} {'status':<8} {'pushes':>6} {'moves':>6} {'expansions':>10} {'wall s':>8} "
+          f"{'exp/s':>9} {'rss MB':>8} {'peak open':>9}")
+    results = {}
+    regressions = []
+    for name, record in run_corpus(load_corpus(args.paths), args.max_expansions, args.time_limit, args.repeat):
+        results[name] = record
+        print(format_row(name, record), flush=True)
+        base = baseline["levels"].get(name) if baseline else None
+        if base is not None:
+            regressions.extend(f"{name}: {p}" for p in compare(record, base, args.threshold))
+
+    total_wall = sum(r["wall"] for r in results.values())
+    # Unsolved runs count too: their expansions are the work the budget bought.
+    total_exp = sum(r["expansions"] or 0 for r in results.values())
+    solved = sum(r["status"] == "solved" for r in results.values())
+    print(f"\n{solved}/{len(results)} solved, {total_exp:,} expansions in {total_wall:.2f}s "
+          f"({total_exp / total_wall if total_wall else 0:,.0f} exp/s)")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump({"version": BENCH_VERSION, "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "python": platform.python_version(), "machine": platform.machine(),
+                       "settings": {"max_expansions": args.max_expansions, "time_limit": args.time_limit,
+                                    "repeat": args.repeat},
+                       "levels": results}, fh, indent=1)
+            fh.write("\n")
+
+    if baseline is not None:
+        missing = sorted(set(baseline["levels"]) - set(results))
+        if missing:
+            print(f"not in this run: {', '.join(missing)}")
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nno regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
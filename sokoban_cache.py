@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from sokoban_solverf import Board, DeadlockPatterns, SolverConfig, astar_search, reachable_area, reconstruct, DIRS
+
+# Persistent solve cache in one SQLite file:
+#   solutions: push sequences keyed by a canonical hash of the position (walls,
+#              goals, boxes and the player's reachable area) and the solver
+#              config, so any player cell inside the area hits the same entry
+#              and the walking moves are rebuilt for the actual start.
+#   tables:    per-level push-distance / dead-square / tunnel tables, keyed by
+#              the walls and goals alone.
+# Bumping CACHE_VERSION discards every stored entry on the next open. Rows
+# carry their size and last use; past max_bytes the least recently used go.
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".sokoban_cache.sqlite3")
+DEFAULT_CACHE_BYTES = 64 << 20
+
+def level_digest(board):
+    return hashlib.sha1(f"v{CACHE_VERSION}:{board.rows}x{board.cols}:".encode("ascii") + bytes(board.walls)
+                        + bytes(board.goals)).hexdigest()
+
+def position_digest(board, boxes, player):
+    box_occ = bytearray(board.size + 1)
+    for b in boxes:
+        box_occ[b] = 1
+    canon = reachable_area(board, player, box_occ, bytearray(board.size + 1), 1)
+    return hashlib.sha1(level_digest(board).encode("ascii") + bytes(box_occ) + canon.to_bytes(4, "little")).hexdigest()
+
+def pushes_from_moves(board, moves, boxes, player):
+    # Replays a move string and keeps only the pushes, as (box cell, dir).
+    box_occ = bytearray(board.size + 1)
+    for b in boxes:
+        box_occ[b] = 1
+    letters = {d[2]: i for i, d in enumerate(DIRS)}
+    pushes = []
+    for mv in moves:
+        d = letters[mv]
+        nxt = board.neighbours[d][player]
+        if box_occ[nxt]:
+            pushes.append((nxt, d))
+            box_occ[nxt] = 0
+            box_occ[board.neighbours[d][nxt]] = 1
+        player = nxt
+    return pushes
+
+class SolutionCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Shared by the GUI's solver thread and the Tk thread.
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.lock, self.db:
+            self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            row = self.db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if row is None or int(row[0]) != CACHE_VERSION:
+                self.db.execute("DROP TABLE IF EXISTS solutions")
+                self.db.execute("DROP TABLE IF EXISTS tables")
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(CACHE_VERSION),))
+            self.db.execute("CREATE TABLE IF NOT EXISTS solutions (position TEXT, config TEXT, pushes TEXT, "
+                            "g INTEGER, expansions INTEGER, size INTEGER, used REAL, "
+                            "PRIMARY KEY (position, config))")
+            self.db.execute("CREATE TABLE IF NOT EXISTS tables (level TEXT PRIMARY KEY, data BLOB, "
+                            "size INTEGER, used REAL)")
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def board(self, walls, goals, cells=()):
+        # A Board whose precomputed tables come from the cache when present.
+        board = Board(walls, goals, cells, tables=False)
+        key = level_digest(board)
+        with self.lock, self.db:
+            row = self.db.execute("SELECT data FROM tables WHERE level = ?", (key,)).fetchone()
+            if row is not None:
+                self.db.execute("UPDATE tables SET used = ? WHERE level = ?", (time.time(), key))
+        if row is not None:
+            push_dist, dead, tunnel = json.loads(zlib.decompress(row[0]))
+            board.set_tables(push_dist, bytearray(dead), [bytearray(t) for t in tunnel])
+            return board
+        board.set_tables()
+        data = zlib.compress(json.dumps([board.push_dist, list(board.dead),
+                                         [list(t) for t in board.tunnel]]).encode("ascii"))
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO tables VALUES (?, ?, ?, ?)", (key, data, len(data), time.time()))
+        self.evict()
+        return board
+
+    def get(self, board, boxes, player, config=None):
+        # boxes/player are board cells; returns a result dict or None.
+        position = position_digest(board, boxes, player)
+        config_key = repr(config or SolverConfig())
+        with self.lock, self.db:
+            row = self.db.execute("SELECT pushes, g, expansions FROM solutions WHERE position = ? AND config = ?",
+                                  (position, config_key)).fetchone()
+            if row is not None:
+                self.db.execute("UPDATE solutions SET used = ? WHERE position = ? AND config = ?",
+                                (time.time(), position, config_key))
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        pushes = [tuple(p) for p in json.loads(row[0])]
+        return {"moves": reconstruct(board, pushes, boxes, player), "expansions": row[2], "g": row[1],
+                "config": (config or SolverConfig()).name, "cached": True}
+
+    def put(self, board, boxes, player, result, config=None):
+        pushes = json.dumps(pushes_from_moves(board, result["moves"], boxes, player))
+        position = position_digest(board, boxes, player)
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (position, repr(config or SolverConfig()), pushes, result["g"], result["expansions"],
+                             len(pushes), time.time()))
+        self.evict()
+
+    def evict(self):
+        # Drop least recently used rows until the total is under 90% of max_bytes.
+        if self.max_bytes is None:
+            return
+        with self.lock, self.db:
+            total = sum(self.db.execute("SELECT COALESCE(SUM(size), 0) FROM solutions").fetchone()
+                        + self.db.execute("SELECT COALESCE(SUM(size), 0) FROM tables").fetchone())
+            if total <= self.max_bytes:
+                return
+            rows = self.db.execute("SELECT 'solutions', rowid, size, used FROM solutions "
+                                   "UNION ALL SELECT 'tables', rowid, size, used FROM tables "
+                                   "ORDER BY used").fetchall()
+            for table, rowid, size, _ in rows:
+                if total <= self.max_bytes * 0.9:
+                    break
+                self.db.execute(f"DELETE FROM {table} WHERE rowid = ?", (rowid,))
+                total -= size
+
+    def stats(self):
+        with self.lock:
+            solutions = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM solutions").fetchone()
+            tables = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM tables").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "solutions": solutions[0], "tables": tables[0],
+                "bytes": solutions[1] + tables[1]}
+
+    def solve(self, walls, goals, start_boxes, start_player, config=None, patterns_path=None, **search_args):
+        # astar_push_move_optimal_improved with the cache in front: a hit costs
+        # one query plus rebuilding the walking moves; a solved miss is stored.
+        board = self.board(walls, goals, set(start_boxes) | {start_player})
+        boxes = tuple(board.index(b) for b in start_boxes)
+        player = board.index(start_player)
+        result = self.get(board, boxes, player, config)
+        if result is not None:
+            return result
+        patterns = DeadlockPatterns(board).load(patterns_path) if patterns_path else None
+        try:
+            result = astar_search(board, boxes, player, config=config, patterns=patterns, **search_args)
+        finally:
+            if patterns is not None:
+                patterns.save(patterns_path)
+        if result is not None:
+            self.put(board, boxes, player, result, config)
+            result["cached"] = False
+        return result
@@ -0,0 +1,123 @@
+import mmap
+import os
+import re
+from array import array
+
+from sokoban_solverf import parse_level
+
+# A map line holds only level characters and at least one wall.
+LEVEL_BLOCK = re.compile(rb"(?m)(?:^[@+$*. _-]*#[#@+$*. _-]*\r?(?:\n|\Z))+")
+# SOK "Key: value" notes (Title, Author, Comment, ...).
+NOTE_LINE = re.compile(r"([A-Za-z][A-Za-z _-]*):(?:\s+(.*))?$")
+
+def read_notes(lines):
+    # Reads the notes directly under a board (no blank line in between):
+    # returns the Title: value, if any, and how many lines belong to the
+    # board. A "Comment:" block runs to "Comment-End:", blank lines included.
+    title = None
+    in_comment = False
+    for n, line in enumerate(lines):
+        m = NOTE_LINE.match(line)
+        key = m.group(1).lower() if m else None
+        if in_comment:
+            in_comment = key != "comment-end"
+            continue
+        if not line or m is None:
+            return title, n
+        if key == "title" and m.group(2):
+            title = m.group(2)
+        in_comment = key == "comment" and not m.group(2)
+    return title, len(lines)
+
+def leading_name(lines):
+    # The name given above a board: a Title: line, else the last plain line
+    # (comment markers stripped); other notes and comment blocks are skipped.
+    title = plain = None
+    in_comment = False
+    for line in lines:
+        line = line.lstrip(";").strip()
+        m = NOTE_LINE.match(line)
+        key = m.group(1).lower() if m else None
+        if in_comment:
+            in_comment = key != "comment-end"
+        elif m is None:
+            plain = line or plain
+        elif key == "title" and m.group(2):
+            title = m.group(2)
+        else:
+            in_comment = key == "comment" and not m.group(2)
+    return title or plain
+
+class LevelCollection:
+    # A plain XSB/SOK file opened lazily: a level is a run of map lines, and
+    # anything else (titles, "; comments", blank lines) separates levels. The
+    # nearest preceding non-map line names the level.
+    #
+    # Opening scans the memory-mapped bytes once, recording each level's byte
+    # range and name. Indexing decodes that range into its map lines, and
+    # parsed(i) runs parse_level on level i at most once. The collection acts
+    # as a sequence of line lists, so it can stand in for a plain list of levels.
+    #
+    # Names: a Title: note directly under the board (the SOK layout) wins, then
+    # a name above the board (see leading_name), then "<file>#<n>".
+    def __init__(self, path):
+        self.path = path
+        self.fh = open(path, "rb")
+        size = os.fstat(self.fh.fileno()).st_size
+        self.data = mmap.mmap(self.fh.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.starts = array("q")
+        self.ends = array("q")
+        self.names = []
+        self.cache = {}
+        self.build_index()
+
+    def build_index(self):
+        # One regex pass finds every maximal run of map lines; only the gaps
+        # between runs are decoded, to pick up level names. Each gap starts
+        # with the notes of the board above it; the rest leads into the next.
+        base = os.path.basename(self.path)
+        spans = [(m.start(), m.end()) for m in LEVEL_BLOCK.finditer(self.data)]
+        bounds = [0] + [x for span in spans for x in span] + [len(self.data)]
+        gaps = [[line.strip() for line in self.data[a:b].decode("utf-8", "replace").split("\n")]
+                for a, b in zip(bounds[::2], bounds[1::2])]
+        leading = gaps[0]
+        for i, (start, end) in enumerate(spans):
+            title, n = read_notes(gaps[i + 1])
+            self.add(start, end, title or leading_name(leading) or f"{base}#{i + 1}")
+            leading = gaps[i + 1][n:]
+
+    def add(self, start, end, name):
+        self.starts.append(start)
+        self.ends.append(end)
+        self.names.append(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        text = self.data[self.starts[index]:self.ends[index]].decode("utf-8", "replace")
+        return [line.rstrip("\r") for line in text.rstrip("\r\n").split("\n")]
+
+    def name(self, index):
+        return self.names[index]
+
+    def parsed(self, index):
+        # (walls, goals, boxes, player) for level index, parsed once.
+        if index < 0:
+            index += len(self)
+        if index not in self.cache:
+            self.cache[index] = parse_level(self[index])
+        return self.cache[index]
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,297 @@
+import heapq
+import multiprocessing
+import os
+import queue
+import time
+from array import array
+
+from sokoban_solverf import (
+    INF,
+    Board,
+    Expander,
+    SolverConfig,
+    astar_push_move_optimal_improved,
+    make_heuristic,
+    push_run,
+    reconstruct,
+)
+
+# Hash-distributed A* (HDA*): every box layout is owned by one worker process,
+# chosen from its Zobrist hash, so each worker keeps its own open list, closed
+# table and node store. Children are shipped to their owner in batches. All
+# player areas of a layout share an owner, so canonical keys stay local.
+#
+# Messages to a worker inbox:
+#   ("nodes", [(f, g, box_hash, boxes, player, parent_worker, parent_node, box, dir, steps), ...])
+#   ("trace", node)  -> replies ("trace", parent_worker, parent_node, box, dir, steps) on results
+#   ("stop",)
+#
+# Termination: `in_flight` counts "nodes" batches sent but not yet taken in,
+# and idle[w] is set while worker w has nothing with f below the incumbent.
+# Both only change under `lock`, and a worker clears its idle flag in the
+# same critical section in which it takes a batch off in_flight, so a
+# snapshot with every worker idle and in_flight == 0 means the search is over.
+# Workers prune at f >= incumbent, so the incumbent is then optimal.
+
+def owner_of(box_hash, n_workers):
+    return (box_hash >> 11) % n_workers
+
+def _hda_worker(wid, n_workers, walls, goals, extent, n_boxes, inboxes, results, lock, idle, in_flight,
+                best, solution, expansions_total, batch_size, cache_size, use_numpy, config):
+    board = Board(walls, goals, extent)
+    player_zobrist = board.player_zobrist
+    bgoals = board.goals
+    inbox = inboxes[wid]
+    expander = Expander(board, make_heuristic(board, n_boxes, cache_size, use_numpy=use_numpy), config)
+    weight = config.weight
+
+    open_list = []
+    closed = {}
+    best_seen = {}
+    parent_worker = array("i")
+    parent_node = array("i")
+    pushed_box = array("i")
+    pushed_dir = bytearray()
+    pushed_steps = array("i")
+    outbox = [[] for _ in range(n_workers)]
+
+    def accept(item):
+        f, g, box_hash, boxes, player, pw, pn, b, d, steps = item
+        if f >= best.value:
+            return
+        seen_key = box_hash ^ player_zobrist[player]
+        if g >= best_seen.get(seen_key, INF):
+            return
+        best_seen[seen_key] = g
+        parent_worker.append(pw)
+        parent_node.append(pn)
+        pushed_box.append(b)
+        pushed_dir.append(d)
+        pushed_steps.append(steps)
+        heapq.heappush(open_list, (f, g, len(pushed_dir) - 1, box_hash, boxes, player))
+
+    def receive(msg):
+        kind = msg[0]
+        if kind == "nodes":
+            for item in msg[1]:
+                accept(item)
+            with lock:
+                idle[wid] = 0
+                in_flight.value -= 1
+        elif kind == "trace":
+            node = msg[1]
+            results.put(("trace", parent_worker[node], parent_node[node], pushed_box[node], pushed_dir[node],
+                         pushed_steps[node]))
+        elif kind == "stop":
+            # Batches still queued for other workers will never be read; don't
+            # let their feeder threads block this process from exiting.
+            for q in inboxes:
+                q.cancel_join_thread()
+            return False
+        return True
+
+    def flush():
+        for dst in range(n_workers):
+            if outbox[dst]:
+                with lock:
+                    in_flight.value += 1
+                inboxes[dst].put(("nodes", outbox[dst]))
+                outbox[dst] = []
+
+    while True:
+        try:
+            while True:
+                if not receive(inbox.get_nowait()):
+                    return
+        except queue.Empty:
+            pass
+
+        if not open_list or open_list[0][0] >= best.value:
+            flush()
+            with lock:
+                idle[wid] = 1
+            try:
+                msg = inbox.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            if not receive(msg):
+                return
+            continue
+
+        expanded = 0
+        while open_list and expanded < batch_size and open_list[0][0] < best.value:
+            f, g, node, box_hash, boxes, player = heapq.heappop(open_list)
+            canon = expander.enter(boxes, player)
+            key = box_hash ^ player_zobrist[canon]
+            # States can reach their owner late with a better g, so closed
+            # entries keep g and are reopened on improvement.
+            if closed.get(key, INF) <= g:
+                expander.leave(boxes)
+                continue
+            closed[key] = g
+
+            if all(bgoals[b] for b in boxes):
+                expander.leave(boxes)
+                with lock:
+                    if g < best.value:
+                        best.value = g
+                        solution[0] = wid
+                        solution[1] = node
+                continue
+
+            expanded += 1
+            for h, b, d, steps, new_boxes, new_box_hash in expander.children(boxes, box_hash, g):
+                new_g = g + steps
+                player = push_run(board, b, d, steps)[-1][0]
+                item = (new_g + weight * h, new_g, new_box_hash, new_boxes, player, wid, node, b, d, steps)
+                dst = owner_of(new_box_hash, n_workers)
+                if dst == wid:
+                    accept(item)
+                else:
+                    outbox[dst].append(item)
+            expander.leave(boxes)
+
+        flush()
+        if expanded:
+            with lock:
+                expansions_total.value += expanded
+
+def hda_star_push_optimal(walls, goals, start_boxes, start_player, workers=None, max_expansions=2_000_000,
+                          time_limit=None, batch_size=64, cache_size=200_000, use_numpy=None, config=None):
+    if config is None:
+        config = SolverConfig()
+    n_workers = max(1, workers or os.cpu_count() or 1)
+    extent = set(start_boxes) | {start_player}
+    board = Board(walls, goals, extent)
+    boxes = tuple(board.index(b) for b in start_boxes)
+    player = board.index(start_player)
+    start_hash = board.box_hash(boxes)
+    start_h = make_heuristic(board, len(boxes), cache_size=0, use_numpy=False).lookup(start_hash, boxes)[0]
+    if start_h >= INF:
+        return None
+
+    ctx = multiprocessing.get_context()
+    lock = ctx.Lock()
+    idle = ctx.Array("b", [1] * n_workers, lock=False)
+    in_flight = ctx.Value("q", 0, lock=False)
+    best = ctx.Value("q", INF, lock=False)
+    solution = ctx.Array("q", [-1, -1], lock=False)
+    expansions_total = ctx.Value("q", 0, lock=False)
+    inboxes = [ctx.Queue() for _ in range(n_workers)]
+    results = ctx.Queue()
+
+    procs = [ctx.Process(target=_hda_worker,
+                         args=(wid, n_workers, set(walls), set(goals), extent, len(boxes), inboxes, results,
+                               lock, idle,
+                               in_flight, best, solution, expansions_total, batch_size, cache_size, use_numpy,
+                               config),
+                         daemon=True)
+             for wid in range(n_workers)]
+    for p in procs:
+        p.start()
+
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+    try:
+        with lock:
+            in_flight.value += 1
+        inboxes[owner_of(start_hash, n_workers)].put(
+            ("nodes", [(config.weight * start_h, 0, start_hash, boxes, player, -1, -1, player, 0, 0)]))
+
+        while True:
+            time.sleep(0.005)
+            with lock:
+                finished = in_flight.value == 0 and all(idle)
+                expansions = expansions_total.value
+            if finished:
+                break
+            if expansions > max_expansions or (deadline is not None and time.monotonic() > deadline):
+                return None
+            if any(not p.is_alive() for p in procs):
+                raise RuntimeError("HDA* worker exited unexpectedly")
+
+        if best.value >= INF:
+            return None
+        pushes = []
+        wid, node = solution[0], solution[1]
+        while True:
+            inboxes[wid].put(("trace", node))
+            _, pw, pn, b, d, steps = results.get()
+            if pw < 0:
+                break
+            pushes.extend(reversed(push_run(board, b, d, steps)))
+            wid, node = pw, pn
+        pushes.reverse()
+        moves = reconstruct(board, pushes, boxes, player)
+        return {"moves": moves, "expansions": expansions, "g": best.value, "workers": n_workers,
+                "config": config.name}
+    finally:
+        for inbox in inboxes:
+            inbox.put(("stop",))
+        for p in procs:
+            p.join(timeout=1)
+            if p.is_alive():
+                p.terminate()
+
+# Portfolio: race differently configured serial solvers in separate processes.
+DEFAULT_PORTFOLIO = (
+    SolverConfig("optimal"),
+    SolverConfig("optimal-no-freeze", freeze_patterns=False),
+    SolverConfig("optimal-strong", strong_deadlock=True),
+    SolverConfig("weighted-2", weight=2),
+    SolverConfig("weighted-5", weight=5),
+)
+
+def _portfolio_worker(index, config, walls, goals, start_boxes, start_player, max_expansions, time_limit,
+                      results):
+    result = astar_push_move_optimal_improved(walls, goals, start_boxes, start_player,
+                                              max_expansions=max_expansions, time_limit=time_limit,
+                                              config=config)
+    results.put((index, result))
+
+def portfolio_solve(walls, goals, start_boxes, start_player, configs=DEFAULT_PORTFOLIO, time_limit=None,
+                    max_expansions=2_000_000, wait_for_best=False):
+    # Returns the first solution found, or with wait_for_best the one with the
+    # fewest pushes (then moves) by time_limit; an answer from a config whose
+    # .optimal is set cannot be beaten, so it ends the wait early. Losers are
+    # terminated. A worker that dies only drops its own config; RuntimeError
+    # is raised only when every worker died and nothing was found.
+    ctx = multiprocessing.get_context()
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_portfolio_worker,
+                         args=(i, config, set(walls), set(goals), tuple(start_boxes), start_player,
+                               max_expansions, time_limit, results),
+                         daemon=True)
+             for i, config in enumerate(configs)]
+    for p in procs:
+        p.start()
+
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+    best = None
+    # A config is finished once it reports or its process dies without
+    # reporting (e.g. killed for memory); a dead worker only fails its config.
+    finished = set()
+    try:
+        while len(finished) < len(procs):
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            try:
+                index, result = results.get(timeout=0.1 if remaining is None else min(0.1, remaining))
+            except queue.Empty:
+                finished.update(i for i, p in enumerate(procs) if p.exitcode not in (None, 0))
+                continue
+            finished.add(index)
+            if result is None:
+                continue
+            if best is None or (result["g"], len(result["moves"])) < (best["g"], len(best["moves"])):
+                best = result
+            if not wait_for_best or configs[index].optimal:
+                break
+        if best is None and all(p.exitcode not in (None, 0) for p in procs):
+            raise RuntimeError("every portfolio worker exited unexpectedly")
+        return best
+    finally:
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+            p.join()
@@ -1,457 +1,1835 @@
-import heapq
-from collections import deque
-import time
-import os
-import sys
-
-DIRS = [(-1, 0, "U"), (1, 0, "D"), (0, -1, "L"), (0, 1, "R")]
-DIR_MAP = {d[2]: (d[0], d[1]) for d in DIRS}
-INF = 10**9
-
-ENABLE_STRONG_DEADLOCK = False
-ENABLE_FREEZE_PATTERNS = True
-
-def parse_level(lines):
-    walls = set()
-    goals = set()
-    boxes = set()
-    player = None
-    for r, row in enumerate(lines):
-        for c, ch in enumerate(row):
-            pos = (r, c)
-            if ch == '#':
-                walls.add(pos)
-            elif ch == '.':
-                goals.add(pos)
-            elif ch == '$':
-                boxes.add(pos)
-            elif ch == '@':
-                player = pos
-            elif ch == '*':
-                boxes.add(pos); goals.add(pos)
-            elif ch == '+':
-                player = pos; goals.add(pos)
-    return walls, goals, frozenset(boxes), player
-
-def print_map(lines, walls, goals, boxes, player):
-    rows = len(lines)
-    cols = max(len(r) for r in lines) if lines else 0
-    for r in range(rows):
-        s = ""
-        for c in range(cols):
-            p = (r, c)
-            if p in walls:
-                s += "#"
-            elif p == player:
-                s += "@"
-            elif p in boxes and p in goals:
-                s += "*"
-            elif p in boxes:
-                s += "$"
-            elif p in goals:
-                s += "."
-            else:
-                s += " "
-        print(s)
-
-def compute_goal_distance_map(walls, goals):
-    dist = {}
-    q = deque()
-    for g in goals:
-        dist[g] = 0
-        q.append(g)
-    while q:
-        r, c = q.popleft()
-        for dr, dc, _ in DIRS:
-            np = (r + dr, c + dc)
-            if np in walls or np in dist:
-                continue
-            dist[np] = dist[(r, c)] + 1
-            q.append(np)
-    return dist
-
-def is_corner_deadlock(cell, walls, goals):
-    if cell in goals:
-        return False
-    r, c = cell
-    up = (r - 1, c); down = (r + 1, c); left = (r, c - 1); right = (r, c + 1)
-    return (up in walls or down in walls) and (left in walls or right in walls)
-
-def is_linear_deadlock(cell, walls, goals):
-    if cell in goals:
-        return False
-    r, c = cell
-    if (r-1, c) in walls and (r+1, c) in walls:
-        left = c
-        while (r, left-1) not in walls:
-            left -= 1
-        right = c
-        while (r, right+1) not in walls:
-            right += 1
-        for cc in range(left, right+1):
-            if (r, cc) in goals:
-                return False
-        return True
-    if (r, c-1) in walls and (r, c+1) in walls:
-        up = r
-        while (up-1, c) not in walls:
-            up -= 1
-        down = r
-        while (down+1, c) not in walls:
-            down += 1
-        for rr in range(up, down+1):
-            if (rr, c) in goals:
-                return False
-        return True
-    return False
-
-def is_2x2_deadlock(cell, walls, goals):
-    r, c = cell
-    blocks = [
-        [(r, c), (r, c+1), (r+1, c), (r+1, c+1)],
-        [(r-1, c), (r-1, c+1), (r, c), (r, c+1)],
-        [(r, c-1), (r, c), (r+1, c-1), (r+1, c)],
-        [(r-1, c-1), (r-1, c), (r, c-1), (r, c)],
-    ]
-    for blk in blocks:
-        any_goal = any(cellp in goals for cellp in blk)
-        if any_goal:
-            continue
-        wall_count = sum(1 for cellp in blk if cellp in walls)
-        if wall_count >= 2:
-            return True
-    return False
-
-def is_two_box_freeze(box_pos, boxes, walls, goals):
-    r, c = box_pos
-    for dr, dc in [(0,1),(1,0),(0,-1),(-1,0)]:
-        nb = (r+dr, c+dc)
-        if nb not in boxes:
-            continue
-        if box_pos in goals or nb in goals:
-            return False
-        r1,c1 = box_pos; r2,c2 = nb
-        if (r1-1,c1) in walls and (r2-1,c2) in walls:
-            if all((r1, x) not in goals for x in range(min(c1,c2)-1, max(c1,c2)+2)):
-                return True
-        if (r1+1,c1) in walls and (r2+1,c2) in walls:
-            if all((r1, x) not in goals for x in range(min(c1,c2)-1, max(c1,c2)+2)):
-                return True
-        if (r1, c1-1) in walls and (r2, c2-1) in walls:
-            if all((y, c1) not in goals for y in range(min(r1,r2)-1, max(r1,r2)+2)):
-                return True
-        if (r1, c1+1) in walls and (r2, c2+1) in walls:
-            if all((y, c1) not in goals for y in range(min(r1,r2)-1, max(r1,r2)+2)):
-                return True
-    return False
-
-def is_deadlock(cell, walls, goals, boxes=None):
-    if is_corner_deadlock(cell, walls, goals):
-        return True
-    if is_linear_deadlock(cell, walls, goals):
-        return True
-    if ENABLE_STRONG_DEADLOCK and is_2x2_deadlock(cell, walls, goals):
-        return True
-    if ENABLE_FREEZE_PATTERNS and boxes is not None:
-        if is_two_box_freeze(cell, set(boxes), walls, goals):
-            return True
-    return False
-
-def bfs_player_path(start, goal, boxes, walls):
-    if start == goal:
-        return []
-    blocked = set(walls) | set(boxes)
-    q = deque([start])
-    parent = {start: None}
-    parent_move = {}
-    while q:
-        cur = q.popleft()
-        for dr, dc, label in DIRS:
-            np = (cur[0] + dr, cur[1] + dc)
-            if np in blocked or np in parent:
-                continue
-            parent[np] = cur
-            parent_move[np] = label
-            if np == goal:
-                path = []
-                node = np
-                while parent[node] is not None:
-                    path.append(parent_move[node])
-                    node = parent[node]
-                path.reverse()
-                return path
-            q.append(np)
-    return None
-
-def hungarian_min_cost(boxes, goals, goal_dist_map):
-    boxes = list(boxes)
-    goals = list(goals)
-    n = max(len(boxes), len(goals))
-    if n == 0:
-        return 0
-    cost = [[0]*n for _ in range(n)]
-    for i in range(n):
-        for j in range(n):
-            if i < len(boxes) and j < len(goals):
-                bx = boxes[i]; gx = goals[j]
-                cost[i][j] = abs(bx[0]-gx[0]) + abs(bx[1]-gx[1])
-            else:
-                cost[i][j] = 0
-    u = [0]*(n+1)
-    v = [0]*(n+1)
-    p = [0]*(n+1)
-    way = [0]*(n+1)
-    for i in range(1, n+1):
-        p[0] = i
-        j0 = 0
-        minv = [INF]*(n+1)
-        used = [False]*(n+1)
-        while True:
-            used[j0] = True
-            i0 = p[j0]
-            delta = INF
-            j1 = 0
-            for j in range(1, n+1):
-                if used[j]:
-                    continue
-                cur = cost[i0-1][j-1] - u[i0] - v[j]
-                if cur < minv[j]:
-                    minv[j] = cur
-                    way[j] = j0
-                if minv[j] < delta:
-                    delta = minv[j]
-                    j1 = j
-            for j in range(0, n+1):
-                if used[j]:
-                    u[p[j]] += delta
-                    v[j] -= delta
-                else:
-                    minv[j] -= delta
-            j0 = j1
-            if p[j0] == 0:
-                break
-        while True:
-            j1 = way[j0]
-            p[j0] = p[j1]
-            j0 = j1
-            if j0 == 0:
-                break
-    assignment = [-1]*n
-    for j in range(1, n+1):
-        if p[j] > 0 and p[j]-1 < len(boxes) and j-1 < len(goals):
-            assignment[p[j]-1] = j-1
-    total_cost = 0
-    for i in range(len(boxes)):
-        j = assignment[i]
-        if j is None or j == -1:
-            if goals:
-                bx = boxes[i]
-                best = min(abs(bx[0]-g[0]) + abs(bx[1]-g[1]) for g in goals)
-                total_cost += best
-        else:
-            bx = boxes[i]; gx = goals[j]
-            total_cost += abs(bx[0]-gx[0]) + abs(bx[1]-gx[1])
-    return total_cost
-
-def heuristic_hungarian(boxes, goals, goal_dist_map):
-    if not boxes or not goals:
-        return 0
-    try:
-        return hungarian_min_cost(boxes, goals, goal_dist_map)
-    except Exception:
-        s = 0
-        for b in boxes:
-            s += min((abs(b[0]-g[0]) + abs(b[1]-g[1])) for g in goals)
-        return s
-
-def reconstruct(came_from, end_key):
-    parts = []
-    cur = end_key
-    while True:
-        info = came_from.get(cur)
-        if info is None:
-            break
-        parent, moves = info
-        parts.append(moves)
-        cur = parent
-    parts.reverse()
-    full_moves = []
-    for p in parts:
-        full_moves.extend(p)
-    return full_moves
-
-def astar_push_move_optimal_improved(walls, goals, start_boxes, start_player, max_expansions=2_000_000):
-    start_key = (tuple(sorted(start_boxes)), start_player)
-    goal_dist_map = compute_goal_distance_map(walls, goals)
-
-    def is_goal_state(boxes):
-        return all(b in goals for b in boxes)
-
-    pq = []
-    gscore = {start_key: 0}
-    fscore = {start_key: heuristic_hungarian(start_boxes, goals, goal_dist_map)}
-    heapq.heappush(pq, (fscore[start_key], gscore[start_key], start_key))
-
-    came_from = {}
-    expansions = 0
-    bfs_cache = {}
-    best_seen = {start_key: 0}
-
-    while pq:
-        f, g, key = heapq.heappop(pq)
-        if g != gscore.get(key, INF):
-            continue
-
-        boxes_tup, player_pos = key
-        boxes = set(boxes_tup)
-
-        if is_goal_state(boxes):
-            full_moves = reconstruct(came_from, key)
-            return {"moves": full_moves, "expansions": expansions, "g": g}
-
-        expansions += 1
-        if expansions > max_expansions:
-            return None
-
-        parent_info = came_from.get(key)
-        parent_boxes_tup = parent_info[0][0] if parent_info is not None else None
-
-        push_candidates = []
-        for b in boxes:
-            for dr, dc, label in DIRS:
-                target = (b[0] + dr, b[1] + dc)
-                player_needed = (b[0] - dr, b[1] - dc)
-                if target in walls or target in boxes:
-                    continue
-                if player_needed in walls or player_needed in boxes:
-                    continue
-                if is_deadlock(target, walls, goals, boxes):
-                    continue
-
-                bfs_key = (player_pos, boxes_tup, player_needed)
-                if bfs_key in bfs_cache:
-                    path_to_push = bfs_cache[bfs_key]
-                else:
-                    path_to_push = bfs_player_path(player_pos, player_needed, boxes, walls)
-                    bfs_cache[bfs_key] = path_to_push
-
-                if path_to_push is None:
-                    continue
-
-                cur_h = heuristic_hungarian(boxes, goals, goal_dist_map)
-                new_boxes = set(boxes)
-                new_boxes.remove(b)
-                new_boxes.add(target)
-                new_h = heuristic_hungarian(new_boxes, goals, goal_dist_map)
-                score_delta = new_h - cur_h
-
-                priority = (score_delta, len(path_to_push))
-                push_candidates.append((priority, b, target, label, path_to_push))
-
-        push_candidates.sort(key=lambda x: x[0])
-
-        for _, b, target, label, path_to_push in push_candidates:
-            new_boxes = set(boxes)
-            new_boxes.remove(b)
-            new_boxes.add(target)
-            new_boxes_tup = tuple(sorted(new_boxes))
-            new_player_pos = b
-
-            moves_between = list(path_to_push) + [label]
-            tentative_g = g + len(moves_between)
-
-            new_key = (new_boxes_tup, new_player_pos)
-            if parent_boxes_tup is not None and new_boxes_tup == parent_boxes_tup:
-                continue
-
-            if tentative_g >= best_seen.get(new_key, INF):
-                continue
-
-            best_seen[new_key] = tentative_g
-            gscore[new_key] = tentative_g
-            h = heuristic_hungarian(new_boxes, goals, goal_dist_map)
-            f_new = tentative_g + h
-            heapq.heappush(pq, (f_new, tentative_g, new_key))
-            came_from[new_key] = (key, moves_between)
-
-    return None
-
-def clear_console():
-    os.system("cls" if os.name == "nt" else "clear")
-
-def animate_solution(level_lines, walls, goals, boxes, player, moves, delay=0.2):
-    cur_boxes = set(boxes)
-    cur_player = player
-    rows = len(level_lines)
-    cols = max(len(r) for r in level_lines)
-    step = 0
-    for m in moves:
-        dr, dc = DIR_MAP[m]
-        next_pos = (cur_player[0] + dr, cur_player[1] + dc)
-        if next_pos in cur_boxes:
-            box_dest = (next_pos[0] + dr, next_pos[1] + dc)
-            if box_dest in walls or box_dest in cur_boxes:
-                print("Illegal push detected during animation; aborting.")
-                return
-            cur_boxes.remove(next_pos)
-            cur_boxes.add(box_dest)
-        cur_player = next_pos
-        step += 1
-
-        clear_console()
-        print(f"Step {step}: Move {m} | Player {cur_player} | Boxes {sorted(cur_boxes)}")
-        for r in range(rows):
-            line = ""
-            for c in range(cols):
-                pos = (r, c)
-                if pos in walls:
-                    line += "#"
-                elif pos == cur_player:
-                    line += "@"
-                elif pos in cur_boxes and pos in goals:
-                    line += "*"
-                elif pos in cur_boxes:
-                    line += "$"
-                elif pos in goals:
-                    line += "."
-                else:
-                    line += " "
-            print(line)
-        try:
-            time.sleep(delay)
-        except Exception:
-            pass
-    print("solved.")
-
-if __name__== "__main__":
-    level = [
-        "#########",
-        "#   .   #",
-        "# $ # $ #",
-        "#   @ . #",
-        "# $ # $ #",
-        "#   . . #",
-        "#########"
-    ]
-
-    walls, goals, boxes, player = parse_level(level)
-    print("Parsed map:")
-    print_map(level, walls, goals, boxes, player)
-    print()
-
-    t0 = time.time()
-    result = astar_push_move_optimal_improved(walls, goals, boxes, player, max_expansions=2_000_000)
-    t1 = time.time()
-
-    if result is None:
-        print("No solution found (or exceeded max expansions).")
-        sys.exit(1)
-
-    print("Solution found!")
-    print("Expansions:", result["expansions"])
-    print("Total moves (g):", result["g"])
-    print("Move sequence (length):", len(result["moves"]))
-    print("Move sequence (U/D/L/R):")
-    print("".join(result["moves"]))
-    print("\nsolving...")
-    animate_solution(level, walls, goals, boxes, player, result["moves"], delay=0.2)
+import hashlib
+import heapq
+import json
+import math
+from array import array
+from collections import OrderedDict, deque
+import random
+import time
+import os
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DIRS = [(-1, 0, "U"), (1, 0, "D"), (0, -1, "L"), (0, 1, "R")]
+DIR_MAP = {d[2]: (d[0], d[1]) for d in DIRS}
+INF = 10**9
+ZOBRIST_SEED = 0x5EED
+NUMPY_MIN_BOXES = 18
+PROGRESS_EVERY = 1024
+
+ENABLE_STRONG_DEADLOCK = False
+ENABLE_FREEZE_PATTERNS = True
+
+class SolverConfig:
+    # Per-call search settings. Unset deadlock flags take the ENABLE_* module
+    # defaults; weight > 1 searches on f = g + weight * h, which is faster but
+    # no longer push-optimal. The 2x2 test behind strong_deadlock also prunes
+    # some solvable positions, so it gives up optimality (and completeness) too.
+    __slots__ = ("name", "strong_deadlock", "freeze_patterns", "weight", "tunnel_macros", "learn_deadlocks",
+                 "pi_corrals")
+
+    def __init__(self, name="default", strong_deadlock=None, freeze_patterns=None, weight=1, tunnel_macros=True,
+                 learn_deadlocks=False, pi_corrals=True):
+        self.name = name
+        self.strong_deadlock = ENABLE_STRONG_DEADLOCK if strong_deadlock is None else strong_deadlock
+        self.freeze_patterns = ENABLE_FREEZE_PATTERNS if freeze_patterns is None else freeze_patterns
+        self.weight = weight
+        self.tunnel_macros = tunnel_macros
+        self.learn_deadlocks = learn_deadlocks
+        self.pi_corrals = pi_corrals
+
+    def __repr__(self):
+        return (f"SolverConfig({self.name!r}, strong_deadlock={self.strong_deadlock}, "
+                f"freeze_patterns={self.freeze_patterns}, weight={self.weight}, "
+                f"tunnel_macros={self.tunnel_macros}, learn_deadlocks={self.learn_deadlocks}, "
+                f"pi_corrals={self.pi_corrals})")
+
+    @property
+    def optimal(self):
+        # True when a solution found with this config is push-optimal.
+        return self.weight == 1 and not self.strong_deadlock
+
+def parse_level(lines):
+    walls = set()
+    goals = set()
+    boxes = set()
+    player = None
+    for r, row in enumerate(lines):
+        for c, ch in enumerate(row):
+            pos = (r, c)
+            if ch == '#':
+                walls.add(pos)
+            elif ch == '.':
+                goals.add(pos)
+            elif ch == '$':
+                boxes.add(pos)
+            elif ch == '@':
+                player = pos
+            elif ch == '*':
+                boxes.add(pos); goals.add(pos)
+            elif ch == '+':
+                player = pos; goals.add(pos)
+    return walls, goals, frozenset(boxes), player
+
+def print_map(lines, walls, goals, boxes, player):
+    rows = len(lines)
+    cols = max(len(r) for r in lines) if lines else 0
+    for r in range(rows):
+        s = ""
+        for c in range(cols):
+            p = (r, c)
+            if p in walls:
+                s += "#"
+            elif p == player:
+                s += "@"
+            elif p in boxes and p in goals:
+                s += "*"
+            elif p in boxes:
+                s += "$"
+            elif p in goals:
+                s += "."
+            else:
+                s += " "
+        print(s)
+
+class Board:
+    # Level geometry compiled to flat integer cells: cell = r * cols + c.
+    # Index `size` is a wall sentinel that off-board neighbours point at, so
+    # the hot loops never need bounds checks.
+    __slots__ = ("rows", "cols", "size", "walls", "goals", "goal_cells", "row", "col", "neighbours", "push_dist", "dead",
+                 "tunnel", "box_zobrist", "player_zobrist")
+
+    def __init__(self, walls, goals, cells=(), tables=True):
+        extent = set(walls) | set(goals) | set(cells)
+        self.rows = max((r for r, _ in extent), default=-1) + 1
+        self.cols = max((c for _, c in extent), default=-1) + 1
+        self.size = size = self.rows * self.cols
+        self.walls = bytearray(size + 1)
+        self.walls[size] = 1
+        self.goals = bytearray(size + 1)
+        for pos in walls:
+            self.walls[self.index(pos)] = 1
+        for pos in goals:
+            self.goals[self.index(pos)] = 1
+        self.goal_cells = tuple(i for i in range(size) if self.goals[i])
+        self.row = [i // self.cols for i in range(size)] + [-1]
+        self.col = [i % self.cols for i in range(size)] + [-1]
+        self.neighbours = []
+        for dr, dc, _ in DIRS:
+            table = []
+            for i in range(size):
+                r, c = divmod(i, self.cols)
+                table.append(self.index((r + dr, c + dc)))
+            table.append(size)
+            self.neighbours.append(table)
+        # Fixed seed so every process derives the same keys for the same level.
+        rng = random.Random(ZOBRIST_SEED)
+        self.box_zobrist = [rng.getrandbits(64) for _ in range(size + 1)]
+        self.player_zobrist = [rng.getrandbits(64) for _ in range(size + 1)]
+        if tables:
+            self.set_tables()
+
+    def set_tables(self, push_dist=None, dead=None, tunnel=None):
+        # Per-level analysis tables; tables=False plus stored copies (see
+        # sokoban_cache) skips recomputing them.
+        self.push_dist = compute_push_distances(self) if push_dist is None else push_dist
+        self.dead = compute_dead_squares(self) if dead is None else dead
+        self.tunnel = compute_tunnels(self) if tunnel is None else tunnel
+
+    def box_hash(self, boxes):
+        h = 0
+        zobrist = self.box_zobrist
+        for b in boxes:
+            h ^= zobrist[b]
+        return h
+
+    def index(self, pos):
+        r, c = pos
+        if 0 <= r < self.rows and 0 <= c < self.cols:
+            return r * self.cols + c
+        return self.size
+
+    def pos(self, cell):
+        return divmod(cell, self.cols)
+
+def compute_push_distances(board):
+    # push_dist[cell][j]: fewest pushes that can take a box from `cell` to goal
+    # j on the empty board, from a reverse "pull" BFS per goal (the puller needs
+    # a free cell behind the box). INF where the goal can never be reached.
+    walls = board.walls
+    neighbours = board.neighbours
+    push_dist = [[INF] * len(board.goal_cells) for _ in range(board.size + 1)]
+    for j, g in enumerate(board.goal_cells):
+        push_dist[g][j] = 0
+        q = deque([g])
+        while q:
+            cur = q.popleft()
+            nd = push_dist[cur][j] + 1
+            for table in neighbours:
+                nxt = table[cur]
+                if walls[nxt] or walls[table[nxt]] or push_dist[nxt][j] != INF:
+                    continue
+                push_dist[nxt][j] = nd
+                q.append(nxt)
+    return push_dist
+
+def compute_dead_squares(board):
+    # Any cell a box can never be pulled to from a goal is dead.
+    walls = board.walls
+    dead = bytearray(board.size + 1)
+    for i in range(board.size):
+        if not walls[i] and min(board.push_dist[i], default=INF) >= INF:
+            dead[i] = 1
+    return dead
+
+def compute_tunnels(board):
+    # tunnel[d][c] is set when a box just pushed onto c in direction d sits in
+    # a one-wide corridor, with the player shut in behind it, and can go one
+    # more cell on inside the corridor. Leaving it there only plugs the
+    # corridor, so the search pushes it on in the same transition, until
+    # it reaches a goal, the corridor's last cell or another box.
+    walls, goals, dead = board.walls, board.goals, board.dead
+    neighbours = board.neighbours
+    tunnel = [bytearray(board.size + 1) for _ in range(4)]
+    for d, step in enumerate(neighbours):
+        side_a, side_b = neighbours[2:] if d < 2 else neighbours[:2]
+        back = neighbours[d ^ 1]
+
+        def enclosed(cell):
+            return walls[side_a[cell]] and walls[side_b[cell]]
+
+        for c in range(board.size):
+            nxt = step[c]
+            if walls[c] or goals[c] or walls[nxt] or dead[nxt] or walls[back[c]]:
+                continue
+            if enclosed(c) and enclosed(back[c]) and enclosed(nxt):
+                tunnel[d][c] = 1
+    return tunnel
+
+def is_2x2_deadlock(board, cell):
+    walls, goals = board.walls, board.goals
+    up, down, left, right = board.neighbours
+    blocks = [
+        (cell, right[cell], down[cell], down[right[cell]]),
+        (up[cell], up[right[cell]], cell, right[cell]),
+        (left[cell], cell, down[left[cell]], down[cell]),
+        (up[left[cell]], up[cell], left[cell], cell),
+    ]
+    for blk in blocks:
+        if any(goals[x] for x in blk):
+            continue
+        if sum(walls[x] for x in blk) >= 2:
+            return True
+    return False
+
+def is_freeze_deadlock(board, cell, box_occ):
+    # box_occ is the layout after the push. A box is blocked on an axis by a
+    # wall on either side, dead squares on both, or a neighbour box that is
+    # itself frozen, checked with this box counted as a wall. A box blocked
+    # on both axes can never move again, so a frozen group with any box off a
+    # goal is a deadlock.
+    walls, goals, dead = board.walls, board.goals, board.dead
+    up, down, left, right = board.neighbours
+    as_wall = set()
+
+    def frozen_group(c):
+        as_wall.add(c)
+        group = [c]
+        try:
+            for a, b in ((left, right), (up, down)):
+                na, nb = a[c], b[c]
+                if walls[na] or walls[nb] or na in as_wall or nb in as_wall or (dead[na] and dead[nb]):
+                    continue
+                for n in (na, nb):
+                    if box_occ[n]:
+                        sub = frozen_group(n)
+                        if sub is not None:
+                            group.extend(sub)
+                            break
+                else:
+                    return None
+            return group
+        finally:
+            as_wall.discard(c)
+
+    group = frozen_group(cell)
+    return group is not None and not all(goals[c] for c in group)
+
+def is_deadlock(board, cell, box_occ=None, config=None):
+    if board.dead[cell]:
+        return True
+    if config is None:
+        config = SolverConfig()
+    if config.strong_deadlock and is_2x2_deadlock(board, cell):
+        return True
+    if config.freeze_patterns and box_occ is not None:
+        if is_freeze_deadlock(board, cell, box_occ):
+            return True
+    return False
+
+class DeadlockPatterns:
+    # Deadlocked box sub-layouts learned during search. After a push, the
+    # boxes clustered around the pushed box (up to `max_boxes`, 8-neighbour
+    # steps) get a small push search on their own: other boxes removed, any
+    # box that leaves the cluster's zone dropped too, started from every
+    # player area. Both only make the problem easier, so if even that cannot
+    # put the remaining boxes on goals, the cluster is dead wherever it
+    # appears. Patterns are indexed by cell so a check only looks at the
+    # ones containing the pushed-to cell; clusters that were cleared, or that
+    # ran out of `node_limit`, go into a bounded negative cache. Sub-searches
+    # may visit at most `budget` states per push checked so far, so learning
+    # costs a bounded multiple of the search it serves; a cluster skipped for
+    # budget is not cached and can be searched later.
+    def __init__(self, board, max_boxes=4, node_limit=400, zone=2, budget=0.5):
+        self.board = board
+        self.max_boxes = max_boxes
+        self.node_limit = node_limit
+        self.zone = zone
+        self.budget = budget
+        self.patterns = {}
+        self.by_cell = {}
+        self.cleared = LRUCache(50_000)
+        self.box_occ = bytearray(board.size + 1)
+        self.mark = [0] * (board.size + 1)
+        self.stamp = 0
+        self.searches = 0
+        self.rejections = 0
+        self.checks = 0
+        self.spent = 0
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def add(self, cells):
+        cells = tuple(sorted(cells))
+        key = self.board.box_hash(cells)
+        if key in self.patterns:
+            return
+        self.patterns[key] = cells
+        for c in cells:
+            self.by_cell.setdefault(c, []).append(cells)
+
+    def deadlocked(self, target, moved_from, box_occ):
+        # Would pushing the box on moved_from to target form a dead pattern?
+        # box_occ still holds the layout before the push.
+        self.checks += 1
+        for cells in self.by_cell.get(target, ()):
+            if all(c == target or (box_occ[c] and c != moved_from) for c in cells):
+                self.rejections += 1
+                return True
+        # Only a box that is stuck on both axes (a wall or box on one side of
+        # each) is worth a search; otherwise it can still be pushed clear.
+        walls = self.board.walls
+        up, down, left, right = self.board.neighbours
+
+        def blocked(cell):
+            return walls[cell] or (box_occ[cell] and cell != moved_from)
+
+        if not ((blocked(up[target]) or blocked(down[target])) and (blocked(left[target]) or blocked(right[target]))):
+            return False
+        cluster = self.cluster(target, moved_from, box_occ)
+        if len(cluster) < 2 or all(self.board.goals[c] for c in cluster):
+            return False
+        key = self.board.box_hash(cluster)
+        if self.cleared.get(key) is not None or self.spent > self.budget * self.checks:
+            return False
+        if self.search(cluster):
+            self.add(cluster)
+            self.rejections += 1
+            return True
+        self.cleared.put(key, True)
+        return False
+
+    def cluster(self, target, moved_from, box_occ):
+        neighbours = self.board.neighbours
+        up, down = neighbours[0], neighbours[1]
+        found = [target]
+        seen = {target}
+        i = 0
+        while i < len(found) and len(found) < self.max_boxes:
+            cur = found[i]
+            i += 1
+            for table in neighbours:
+                for nb in (table[cur], up[table[cur]], down[table[cur]]):
+                    if nb in seen or not box_occ[nb] or nb == moved_from:
+                        continue
+                    seen.add(nb)
+                    found.append(nb)
+                    if len(found) == self.max_boxes:
+                        return tuple(found)
+        return tuple(found)
+
+    def search(self, cluster):
+        # True only when the relaxed cluster provably cannot be solved.
+        board = self.board
+        walls, goals, dead = board.walls, board.goals, board.dead
+        neighbours = board.neighbours
+        row, col = board.row, board.col
+        zone = self.zone
+        self.searches += 1
+
+        def in_zone(cell):
+            return any(abs(row[cell] - row[c]) <= zone and abs(col[cell] - col[c]) <= zone for c in cluster)
+
+        box_occ, mark = self.box_occ, self.mark
+        start = tuple(sorted(cluster))
+        for b in start:
+            box_occ[b] = 1
+        self.stamp += 1
+        frontier = deque((start, canon) for canon in box_areas(board, start, box_occ, mark, self.stamp))
+        for b in start:
+            box_occ[b] = 0
+        seen = set(frontier)
+        stuck = True
+        while frontier:
+            if len(seen) > self.node_limit:
+                stuck = False
+                break
+            boxes, player = frontier.popleft()
+            if all(goals[b] for b in boxes):
+                stuck = False
+                break
+            for b in boxes:
+                box_occ[b] = 1
+            self.stamp += 1
+            reachable_area(board, player, box_occ, mark, self.stamp)
+            pushes = [(i, b, neighbours[d][b]) for i, b in enumerate(boxes) for d in range(4)
+                      if not (walls[neighbours[d][b]] or box_occ[neighbours[d][b]] or dead[neighbours[d][b]])
+                      and mark[neighbours[d ^ 1][b]] == self.stamp]
+            for i, b, target in pushes:
+                # A box pushed out of the zone is dropped from the cluster.
+                kept = in_zone(target)
+                box_occ[b] = 0
+                box_occ[target] = kept
+                self.stamp += 1
+                canon = reachable_area(board, b, box_occ, mark, self.stamp)
+                box_occ[target] = 0
+                box_occ[b] = 1
+                rest = boxes[:i] + boxes[i + 1:]
+                state = (tuple(sorted(rest + (target,))) if kept else rest, canon)
+                if state not in seen:
+                    seen.add(state)
+                    frontier.append(state)
+            for b in boxes:
+                box_occ[b] = 0
+        self.spent += len(seen)
+        return stuck
+
+    def fingerprint(self):
+        board = self.board
+        return hashlib.sha1(bytes(f"{board.rows}x{board.cols}:", "ascii") + bytes(board.walls)
+                            + bytes(board.goals)).hexdigest()
+
+    def save(self, path):
+        # Cleared cluster keys are saved too, so a warm start skips their
+        # searches; they are only valid for the same node_limit.
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump({"level": self.fingerprint(), "patterns": list(self.patterns.values()),
+                       "node_limit": self.node_limit, "cleared": list(self.cleared.data)}, fh)
+
+    def load(self, path):
+        # Missing files leave the store empty; a file for another level is an error.
+        if not os.path.exists(path):
+            return self
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        if data.get("level") != self.fingerprint():
+            raise ValueError(f"{path}: deadlock patterns belong to a different level")
+        for cells in data["patterns"]:
+            self.add(cells)
+        if data.get("node_limit") == self.node_limit:
+            for key in data.get("cleared", ()):
+                self.cleared.put(key, True)
+        return self
+
+    def stats(self):
+        return {"patterns": len(self.patterns), "searches": self.searches, "search_states": self.spent,
+                "checks": self.checks, "rejections": self.rejections}
+
+def bfs_player_path(board, start, goal, box_occ):
+    if start == goal:
+        return []
+    walls = board.walls
+    neighbours = board.neighbours
+    parent = {start: None}
+    parent_move = {}
+    q = deque([start])
+    while q:
+        cur = q.popleft()
+        for d in range(4):
+            np = neighbours[d][cur]
+            if walls[np] or box_occ[np] or np in parent:
+                continue
+            parent[np] = cur
+            parent_move[np] = DIRS[d][2]
+            if np == goal:
+                path = []
+                node = np
+                while parent[node] is not None:
+                    path.append(parent_move[node])
+                    node = parent[node]
+                path.reverse()
+                return path
+            q.append(np)
+    return None
+
+def reachable_area(board, start, box_occ, mark, stamp):
+    # Flood the player's area, tagging every reached cell with `stamp` in `mark`.
+    # Returns the minimum reachable index, used as the area's canonical cell.
+    walls = board.walls
+    neighbours = board.neighbours
+    mark[start] = stamp
+    stack = [start]
+    canon = start
+    while stack:
+        cur = stack.pop()
+        if cur < canon:
+            canon = cur
+        for table in neighbours:
+            np = table[cur]
+            if mark[np] == stamp or walls[np] or box_occ[np]:
+                continue
+            mark[np] = stamp
+            stack.append(np)
+    return canon
+
+def assignment_cost_row(board, box):
+    return board.push_dist[box]
+
+def assignment_matrix(board, boxes):
+    n = max(len(boxes), len(board.goal_cells))
+    pad = [0] * (n - len(board.goal_cells))
+    cost = [assignment_cost_row(board, b) + pad if pad else assignment_cost_row(board, b) for b in boxes]
+    cost.extend([0] * n for _ in range(n - len(boxes)))
+    return cost
+
+def hungarian_augment(cost, u, v, p, i):
+    # One phase of the Hungarian method: match row i (1-based) against the rows
+    # already matched in p, keeping the potentials u/v feasible.
+    n = len(cost)
+    unbounded = float("inf")
+    way = [0]*(n+1)
+    minv = [unbounded]*(n+1)
+    used = [False]*(n+1)
+    p[0] = i
+    j0 = 0
+    while True:
+        used[j0] = True
+        i0 = p[j0]
+        cost_row = cost[i0-1]
+        ui0 = u[i0]
+        delta = unbounded
+        j1 = 0
+        for j in range(1, n+1):
+            if used[j]:
+                continue
+            cur = cost_row[j-1] - ui0 - v[j]
+            if cur < minv[j]:
+                minv[j] = cur
+                way[j] = j0
+            if minv[j] < delta:
+                delta = minv[j]
+                j1 = j
+        for j in range(0, n+1):
+            if used[j]:
+                u[p[j]] += delta
+                v[j] -= delta
+            else:
+                minv[j] -= delta
+        j0 = j1
+        if p[j0] == 0:
+            break
+    while True:
+        j1 = way[j0]
+        p[j0] = p[j1]
+        j0 = j1
+        if j0 == 0:
+            break
+
+def hungarian_solve(cost):
+    n = len(cost)
+    u = [0]*(n+1)
+    v = [0]*(n+1)
+    p = [0]*(n+1)
+    for i in range(1, n+1):
+        hungarian_augment(cost, u, v, p, i)
+    return u, v, p
+
+def assignment_total(cost, p, n_boxes, n_goals):
+    total_cost = 0
+    for j in range(1, len(p)):
+        i = p[j] - 1
+        if i < 0 or i >= n_boxes:
+            continue
+        if j - 1 < n_goals:
+            total_cost += cost[i][j-1]
+        elif n_goals:
+            total_cost += min(cost[i][:n_goals])
+    return min(total_cost, INF)
+
+class LRUCache:
+    # Bounded LRU map with hit/miss/eviction counters. `maxsize` caps the entry
+    # count (None: no cap) and `max_bytes`, if set, caps the summed weigh(value)
+    # estimate. maxsize=0 disables the cache: every get misses, put stores nothing.
+    def __init__(self, maxsize=200_000, max_bytes=None, weigh=sys.getsizeof):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.weigh = weigh
+        self.data = OrderedDict()
+        self.sizes = {}
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key):
+        value = self.data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if self.maxsize == 0:
+            return value
+        data = self.data
+        if key in data:
+            self._discard(key)
+        data[key] = value
+        if self.max_bytes is not None:
+            size = self.weigh(value)
+            self.sizes[key] = size
+            self.nbytes += size
+        while data and ((self.maxsize is not None and len(data) > self.maxsize)
+                        or (self.max_bytes is not None and self.nbytes > self.max_bytes)):
+            self._discard(next(iter(data)))
+            self.evictions += 1
+        return value
+
+    def _discard(self, key):
+        del self.data[key]
+        self.nbytes -= self.sizes.pop(key, 0)
+
+    def clear(self):
+        self.data.clear()
+        self.sizes.clear()
+        self.nbytes = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self.data), "bytes": self.nbytes}
+
+def assignment_entry_bytes(entry):
+    # Rough footprint of one AssignmentCache entry: the containers it owns plus
+    # the one cost row that differs from its parent (other rows are shared).
+    _, boxes, cost, u, v, p = entry
+    size = sys.getsizeof(entry) + sys.getsizeof(boxes)
+    if cost is not None:
+        size += sys.getsizeof(cost) + sys.getsizeof(cost[0]) + 3 * sys.getsizeof(u) + 28 * (len(u) + len(v))
+    return size
+
+class AssignmentCache:
+    # Hungarian lower bound memoised per distinct box set (keyed by its Zobrist
+    # hash) in an LRUCache. Entries keep the solved matrix and potentials so a
+    # child that moves one box only re-augments that box's row: O(n^2)
+    # instead of a full O(n^3) solve. Entries are (h, boxes, cost, u, v, p).
+    def __init__(self, board, maxsize=200_000, max_bytes=None):
+        self.board = board
+        self.cache = LRUCache(maxsize, max_bytes, weigh=assignment_entry_bytes)
+
+    def lookup(self, box_hash, boxes):
+        entry = self.cache.get(box_hash)
+        if entry is not None:
+            return entry
+        return self.cache.put(box_hash, self.solve(tuple(boxes)))
+
+    def solve(self, boxes):
+        if not boxes or not self.board.goal_cells:
+            return (0, boxes, None, None, None, None)
+        cost = assignment_matrix(self.board, boxes)
+        u, v, p = hungarian_solve(cost)
+        h = assignment_total(cost, p, len(boxes), len(self.board.goal_cells))
+        return (h, boxes, cost, u, v, p)
+
+    def children(self, parent, moves):
+        # moves: (box_hash, moved_from, moved_to) per child of one expansion.
+        return [self.child(parent, box_hash, moved_from, moved_to)
+                for box_hash, moved_from, moved_to in moves]
+
+    def child(self, parent, box_hash, moved_from, moved_to):
+        entry = self.cache.get(box_hash)
+        if entry is not None:
+            return entry
+        _, boxes, cost, u, v, p = parent
+        i = boxes.index(moved_from)
+        boxes = boxes[:i] + (moved_to,) + boxes[i + 1:]
+        if cost is None:
+            return self.cache.put(box_hash, (0, boxes, None, None, None, None))
+
+        n_goals = len(self.board.goal_cells)
+        new_row = assignment_cost_row(self.board, moved_to)
+        if len(cost) > n_goals:
+            new_row = new_row + [0] * (len(cost) - n_goals)
+        cost = list(cost)
+        cost[i] = new_row
+        u = list(u)
+        v = list(v)
+        p = list(p)
+        # Unmatch the moved box's row, lower its potential until it is feasible
+        # against the new costs, and re-augment just that row.
+        p[p.index(i + 1, 1)] = 0
+        u[i + 1] = min(new_row[j] - v[j + 1] for j in range(len(new_row)))
+        hungarian_augment(cost, u, v, p, i + 1)
+        h = assignment_total(cost, p, len(boxes), n_goals)
+        return self.cache.put(box_hash, (h, boxes, cost, u, v, p))
+
+def numpy_entry_bytes(entry):
+    _, boxes, cells, u, v, p = entry
+    size = sys.getsizeof(entry) + sys.getsizeof(boxes)
+    if cells is not None:
+        size += cells.nbytes + u.nbytes + v.nbytes + p.nbytes + 4 * 112
+    return size
+
+class NumpyAssignmentCache(AssignmentCache):
+    # NumPy variant of AssignmentCache: all the children of one expansion are
+    # repaired together by running the single-row augmentation phase in
+    # lockstep across the batch, and push legality (walls, boxes, dead squares,
+    # player reach) is filtered in one vectorised pass. Entries are
+    # (h, boxes, cells, u, v, p) with int64 arrays; instead of a cost matrix they
+    # keep the row cells, since any matrix is one gather from `table`. Ties
+    # break exactly as in the pure-Python path, so both give the same search.
+    def __init__(self, board, maxsize=200_000, max_bytes=None):
+        super().__init__(board, maxsize, max_bytes)
+        self.cache.weigh = numpy_entry_bytes
+        self.n_goals = len(board.goal_cells)
+        self.pad_cell = board.size + 1
+        self.neighbours = np.array(board.neighbours, dtype=np.int64)
+        self.behind = self.neighbours[[1, 0, 3, 2]]
+        self.blocked = np.frombuffer(bytes(board.walls), dtype=np.uint8).astype(bool)
+        self.blocked |= np.frombuffer(bytes(board.dead), dtype=np.uint8).astype(bool)
+        self.table = None
+
+    def _ensure_table(self, n):
+        # push_dist as a (size + 2, n) matrix: zero columns pad up to n goals and
+        # the extra last row (pad_cell) stands for the padding rows.
+        if self.table is None or self.table.shape[1] != n:
+            table = np.zeros((self.board.size + 2, n), dtype=np.int64)
+            if self.n_goals:
+                table[:-1, :self.n_goals] = np.array(self.board.push_dist, dtype=np.int64)
+                self.row_min = table[:, :self.n_goals].min(axis=1)
+            self.table = table
+
+    def solve(self, boxes):
+        entry = AssignmentCache.solve(self, boxes)
+        h, boxes, cost, u, v, p = entry
+        if cost is None:
+            return entry
+        n = len(cost)
+        self._ensure_table(n)
+        cells = np.array(list(boxes) + [self.pad_cell] * (n - len(boxes)), dtype=np.int64)
+        return (h, boxes, cells, np.array(u, dtype=np.int64), np.array(v, dtype=np.int64),
+                np.array(p, dtype=np.int64))
+
+    def legal_pushes(self, boxes, box_occ, mark, stamp):
+        bx = np.array(boxes, dtype=np.int64)
+        reach = np.array(mark, dtype=np.int64) == stamp
+        targets = self.neighbours[:, bx]
+        ok = ~self.blocked[targets] & ~np.isin(targets, bx) & reach[self.behind[:, bx]]
+        return [(int(i), boxes[i], int(d), int(targets[d, i])) for i, d in zip(*np.nonzero(ok.T))]
+
+    def children(self, parent, moves):
+        out = [self.cache.get(box_hash) for box_hash, _, _ in moves]
+        todo = [k for k, entry in enumerate(out) if entry is None]
+        if not todo:
+            return out
+        _, boxes, cells, u, v, p = parent
+        if cells is None:
+            for k in todo:
+                box_hash, moved_from, moved_to = moves[k]
+                i = boxes.index(moved_from)
+                out[k] = self.cache.put(box_hash, (0, boxes[:i] + (moved_to,) + boxes[i + 1:],
+                                                   None, None, None, None))
+            return out
+
+        table = self.table
+        m = len(todo)
+        n = len(cells)
+        big = np.int64(1 << 62)
+        ar = np.arange(m)
+        rows = np.array([boxes.index(moves[k][1]) for k in todo], dtype=np.int64)
+        cells_batch = np.repeat(cells[None], m, axis=0)
+        cells_batch[ar, rows] = [moves[k][2] for k in todo]
+        U = np.repeat(u[None], m, axis=0)
+        V = np.repeat(v[None], m, axis=0)
+        P = np.repeat(p[None], m, axis=0)
+        r1 = rows + 1
+        P[P == r1[:, None]] = 0
+        U[ar, r1] = (table[cells_batch[ar, rows]] - V[:, 1:]).min(axis=1)
+        rows_col = ar[:, None]
+
+        # hungarian_augment for row r1 of every child, run in lockstep in its
+        # Dijkstra form: grow shortest reduced-cost distances over the columns
+        # until each child reaches a free one, then shift the potentials once.
+        # Finished children stay masked out until the slowest one is done.
+        dist = table[cells_batch[ar, rows]] - U[ar, r1][:, None] - V[:, 1:]
+        way = np.zeros((m, n), dtype=np.int64)
+        visited = np.zeros((m, n), dtype=bool)
+        j1 = dist.argmin(axis=1)
+        reach_d = dist[ar, j1]
+        active = P[ar, j1 + 1] != 0
+        while active.any():
+            visited[ar[active], j1[active]] = True
+            i0 = P[ar, j1 + 1]
+            nd = table[cells_batch[ar, i0 - 1]] - (U[ar, i0] - reach_d)[:, None] - V[:, 1:]
+            upd = ~visited & (nd < dist) & active[:, None]
+            np.copyto(dist, nd, where=upd)
+            np.copyto(way, (j1 + 1)[:, None], where=upd)
+            masked = np.where(visited, big, dist)
+            nxt = masked.argmin(axis=1)
+            j1 = np.where(active, nxt, j1)
+            reach_d = dist[ar, j1]
+            active &= P[ar, j1 + 1] != 0
+        shift = np.where(visited, reach_d[:, None] - dist, 0)
+        U[rows_col, P[:, 1:]] += shift
+        U[ar, r1] += reach_d
+        V[:, 1:] -= shift
+        j0 = j1 + 1
+        active = np.ones(m, dtype=bool)
+        while active.any():
+            prev = way[ar, j0 - 1]
+            P[ar, j0] = np.where(active, np.where(prev > 0, P[ar, np.maximum(prev, 1)], r1), P[ar, j0])
+            j0 = np.where(active, prev, j0)
+            active &= j0 != 0
+        P[:, 0] = 0
+
+        assigned = P[:, 1:] - 1
+        real = (assigned >= 0) & (assigned < len(boxes))
+        assigned_cells = cells_batch[rows_col, np.where(real, assigned, 0)]
+        cols = np.arange(n)
+        totals = np.where(real & (cols < self.n_goals), table[assigned_cells, cols], 0).sum(axis=1)
+        if n > self.n_goals and self.n_goals:
+            totals += np.where(real & (cols >= self.n_goals), self.row_min[assigned_cells], 0).sum(axis=1)
+        totals = np.minimum(totals, INF)
+
+        for c, k in enumerate(todo):
+            box_hash, _, moved_to = moves[k]
+            i = rows[c]
+            entry = (int(totals[c]), boxes[:i] + (moved_to,) + boxes[i + 1:],
+                     cells_batch[c].copy(), U[c].copy(), V[c].copy(), P[c].copy())
+            out[k] = self.cache.put(box_hash, entry)
+        return out
+
+class NodeTable:
+    # Array-backed search tree. Node i was reached from parent[i] by pushing the
+    # box on cell box[i] in direction dir[i], at g[i] pushes; the player then
+    # stands on box[i]. Node 0 is the root.
+    __slots__ = ("parent", "box", "dir", "g")
+
+    def __init__(self):
+        self.parent = array("i")
+        self.box = array("i")
+        self.dir = bytearray()
+        self.g = array("i")
+
+    def __len__(self):
+        return len(self.g)
+
+    def add(self, parent, box, d, g):
+        self.parent.append(parent)
+        self.box.append(box)
+        self.dir.append(d)
+        self.g.append(g)
+        return len(self.g) - 1
+
+    def add_run(self, parent, run, g):
+        # One node per push of a macro run [(box, dir), ...] that ends at cost g.
+        g -= len(run)
+        for box, d in run:
+            g += 1
+            parent = self.add(parent, box, d, g)
+        return parent
+
+    def pushes(self, node):
+        out = []
+        while node > 0:
+            out.append((self.box[node], self.dir[node]))
+            node = self.parent[node]
+        out.reverse()
+        return out
+
+    def layout(self, board, node, start_boxes, start_hash):
+        # Replays the pushes from the root to rebuild node's box tuple (in the
+        # order Expander.children would have produced it) and its Zobrist hash,
+        # so open entries need not carry them.
+        parent, box, dirs = self.parent, self.box, self.dir
+        chain = []
+        while node > 0:
+            chain.append(node)
+            node = parent[node]
+        boxes = list(start_boxes)
+        box_hash = start_hash
+        zobrist = board.box_zobrist
+        neighbours = board.neighbours
+        for node in reversed(chain):
+            b = box[node]
+            target = neighbours[dirs[node]][b]
+            boxes[boxes.index(b)] = target
+            box_hash ^= zobrist[b] ^ zobrist[target]
+        return tuple(boxes), box_hash
+
+class SeenStates:
+    # A*'s duplicate filter and closed set in one open-addressing table of flat
+    # arrays: state key -> NodeTable index of the cheapest node generated for
+    # it, stored as node + 1 while open and -(node + 1) once closed (0 is an
+    # empty slot). The table doubles at half load. get() answers Expander's
+    # "best g so far" query; closed states answer -1, so nothing is generated
+    # into them again. A node displaced by a cheaper one for its key is
+    # flagged in `superseded`, so its open entry can be dropped unexamined.
+    __slots__ = ("nodes", "keys", "slots", "mask", "count", "superseded")
+
+    def __init__(self, nodes, size=1 << 12):
+        self.nodes = nodes
+        self.count = 0
+        self.superseded = bytearray()
+        self.keys = array("Q", bytes(8 * size))
+        self.slots = array("i", bytes(4 * size))
+        self.mask = size - 1
+
+    def __len__(self):
+        return self.count
+
+    def grow(self):
+        old_keys, old_slots = self.keys, self.slots
+        size = 2 * (self.mask + 1)
+        self.keys = keys = array("Q", bytes(8 * size))
+        self.slots = slots = array("i", bytes(4 * size))
+        self.mask = mask = size - 1
+        for key, v in zip(old_keys, old_slots):
+            if v:
+                i = (key >> 7) & mask
+                while slots[i]:
+                    i = (i + 1) & mask
+                keys[i] = key
+                slots[i] = v
+
+    def find(self, key):
+        keys, slots, mask = self.keys, self.slots, self.mask
+        i = (key >> 7) & mask
+        while slots[i] and keys[i] != key:
+            i = (i + 1) & mask
+        return i
+
+    def get(self, key, default=INF):
+        keys, slots, mask = self.keys, self.slots, self.mask
+        i = (key >> 7) & mask
+        while slots[i]:
+            if keys[i] == key:
+                v = slots[i]
+                return self.nodes.g[v - 1] if v > 0 else -1
+            i = (i + 1) & mask
+        return default
+
+    def add(self, key, node):
+        # Callers only add when get() said node is cheaper than what is there.
+        i = self.find(key)
+        v = self.slots[i]
+        if v:
+            old = v - 1
+            if old >= len(self.superseded):
+                self.superseded.extend(bytes(old + 1024 - len(self.superseded)))
+            self.superseded[old] = 1
+        else:
+            self.keys[i] = key
+            self.count += 1
+        self.slots[i] = node + 1
+        if 2 * self.count > self.mask:
+            self.grow()
+
+    def close(self, key, node):
+        # False when the state was already closed.
+        i = self.find(key)
+        v = self.slots[i]
+        if v < 0:
+            return False
+        if not v:
+            self.keys[i] = key
+            self.count += 1
+        self.slots[i] = -(node + 1)
+        if 2 * self.count > self.mask:
+            self.grow()
+        return True
+
+    def is_superseded(self, node):
+        return node < len(self.superseded) and self.superseded[node]
+
+class BucketQueue:
+    # Open list for integer f: one array of node indices per (f, g) and a heap
+    # of the distinct (f, g) keys, so entries cost 4 bytes instead of a heap
+    # tuple. Nodes are numbered in creation order, so taking each bucket front
+    # first pops in (f, g, node) order, like a heap of tuples would.
+    __slots__ = ("order", "buckets", "size")
+
+    def __init__(self):
+        self.order = []
+        self.buckets = {}
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, f, g, node):
+        key = (f, g)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [0, array("i")]
+            heapq.heappush(self.order, key)
+        bucket[1].append(node)
+        self.size += 1
+
+    def pop(self):
+        # (g, node) of the first entry.
+        key = self.order[0]
+        bucket = self.buckets[key]
+        node = bucket[1][bucket[0]]
+        bucket[0] += 1
+        if bucket[0] == len(bucket[1]):
+            del self.buckets[key]
+            heapq.heappop(self.order)
+        self.size -= 1
+        return key[1], node
+
+def push_run(board, box, d, steps):
+    # The single pushes behind one transition: the box on `box` moved `steps`
+    # cells in direction d.
+    step = board.neighbours[d]
+    run = []
+    for _ in range(steps):
+        run.append((box, d))
+        box = step[box]
+    return run
+
+def legal_pushes(board, boxes, box_occ, mark, stamp):
+    walls, dead = board.walls, board.dead
+    neighbours = board.neighbours
+    out = []
+    for i, b in enumerate(boxes):
+        for d in range(4):
+            target = neighbours[d][b]
+            if walls[target] or box_occ[target] or dead[target]:
+                continue
+            if mark[neighbours[d ^ 1][b]] != stamp:
+                continue
+            out.append((i, b, d, target))
+    return out
+
+def pi_corral_pushes(board, boxes, box_occ, mark, stamp, region, region_id):
+    # A corral is a free area the player cannot reach, fenced by walls and
+    # boxes. It is a PI-corral when each fence box can only ever be pushed
+    # into it (before some fence box moves) and the player can make all of
+    # those pushes now. If such a corral still needs work (a fence box off a
+    # goal, or an empty goal inside), every solution pushes one of its fence
+    # boxes in first, and doing that now costs nothing, so the other pushes
+    # can be skipped. Returns ({(box, dir), ...} of the corral with the fewest
+    # pushes, or None; next free region id). `region` is scratch space whose
+    # ids below region_id are stale.
+    walls, goals, dead = board.walls, board.goals, board.dead
+    neighbours = board.neighbours
+    can_fill = len(boxes) >= len(board.goal_cells)
+    best = None
+    for box in boxes:
+        for table in neighbours:
+            start = table[box]
+            if walls[start] or box_occ[start] or mark[start] == stamp or region[start] >= region_id:
+                continue
+            rid = region_id
+            region_id += 1
+            region[start] = rid
+            cells = [start]
+            fence = set()
+            for cur in cells:
+                for tbl in neighbours:
+                    nxt = tbl[cur]
+                    if walls[nxt] or region[nxt] == rid:
+                        continue
+                    if box_occ[nxt]:
+                        fence.add(nxt)
+                        continue
+                    region[nxt] = rid
+                    cells.append(nxt)
+            if not (any(not goals[x] for x in fence) or (can_fill and any(goals[c] for c in cells))):
+                continue
+            inward = set()
+            for x in fence:
+                for d in range(4):
+                    t, p = neighbours[d][x], neighbours[d ^ 1][x]
+                    if walls[t] or walls[p] or dead[t]:
+                        continue
+                    if region[t] == rid:
+                        if mark[p] != stamp:
+                            break
+                        inward.add((x, d))
+                    elif box_occ[t]:
+                        if t not in fence:
+                            break
+                    elif not ((box_occ[p] and p in fence) or region[p] == rid):
+                        break
+                else:
+                    continue
+                break
+            else:
+                if inward and (best is None or len(inward) < len(best)):
+                    best = inward
+    return best, region_id
+
+def make_heuristic(board, n_boxes, cache_size=200_000, cache_bytes=None, use_numpy=None):
+    # cache_size / cache_bytes bound the heuristic memo (cache_size=0 disables
+    # it). use_numpy: None picks the batched NumPy path for NUMPY_MIN_BOXES or
+    # more boxes, True forces it; both fall back to pure Python without NumPy.
+    if use_numpy is None:
+        use_numpy = n_boxes >= NUMPY_MIN_BOXES
+    if use_numpy and np is not None:
+        return NumpyAssignmentCache(board, cache_size, cache_bytes)
+    return AssignmentCache(board, cache_size, cache_bytes)
+
+class Expander:
+    # Scratch state for generating pushes, shared by the search engines: the
+    # box occupancy array, flood-fill marks and the heuristic memo. enter() a
+    # popped state (returns its canonical player cell), take its children(),
+    # then leave() it. `patterns` is a DeadlockPatterns store to check and
+    # grow; config.learn_deadlocks starts an empty one when none is given.
+    def __init__(self, board, heuristic, config=None, patterns=None):
+        self.board = board
+        self.heuristic = heuristic
+        self.config = config if config is not None else SolverConfig()
+        if patterns is None and self.config.learn_deadlocks:
+            patterns = DeadlockPatterns(board)
+        self.patterns = patterns
+        self.batched = isinstance(heuristic, NumpyAssignmentCache)
+        self.box_occ = bytearray(board.size + 1)
+        self.mark = [0] * (board.size + 1)
+        self.stamp = 0
+        self.region = [0] * (board.size + 1)
+        self.region_id = 1
+
+    def enter(self, boxes, player):
+        box_occ = self.box_occ
+        for b in boxes:
+            box_occ[b] = 1
+        self.stamp += 1
+        return reachable_area(self.board, player, box_occ, self.mark, self.stamp)
+
+    def leave(self, boxes):
+        box_occ = self.box_occ
+        for b in boxes:
+            box_occ[b] = 0
+
+    def children(self, boxes, box_hash, g, best_seen=None, record=True):
+        # Transitions from the entered state at cost g, best heuristic delta
+        # first, as (h, pushed_box, dir, steps, new_boxes, new_box_hash): the
+        # box on pushed_box goes `steps` cells in dir (more than one through a
+        # tunnel) for `steps` pushes, leaving the player right behind it.
+        # best_seen (raw key -> g), when given, filters and records repeats;
+        # with record=False it only filters and the caller records.
+        board = self.board
+        heuristic = self.heuristic
+        box_occ = self.box_occ
+        neighbours = board.neighbours
+        box_zobrist, player_zobrist = board.box_zobrist, board.player_zobrist
+        config = self.config
+        tunnel = board.tunnel if config.tunnel_macros else None
+        patterns = self.patterns
+
+        entry = heuristic.lookup(box_hash, boxes)
+        cur_h = entry[0]
+        if self.batched:
+            pushes = heuristic.legal_pushes(boxes, box_occ, self.mark, self.stamp)
+        else:
+            pushes = legal_pushes(board, boxes, box_occ, self.mark, self.stamp)
+        if config.pi_corrals:
+            allowed, self.region_id = pi_corral_pushes(board, boxes, box_occ, self.mark, self.stamp,
+                                                       self.region, self.region_id)
+            if allowed is not None:
+                pushes = [push for push in pushes if (push[1], push[2]) in allowed]
+
+        specs = []
+        for i, b, d, target in pushes:
+            steps = 1
+            if tunnel is not None:
+                step, run_on = neighbours[d], tunnel[d]
+                while run_on[target] and not box_occ[step[target]]:
+                    target = step[target]
+                    steps += 1
+            # The freeze test wants the layout after the push.
+            box_occ[b] = 0
+            box_occ[target] = 1
+            dead_end = is_deadlock(board, target, box_occ, config)
+            box_occ[target] = 0
+            box_occ[b] = 1
+            if dead_end:
+                continue
+            if patterns is not None and patterns.deadlocked(target, b, box_occ):
+                continue
+            new_box_hash = box_hash ^ box_zobrist[b] ^ box_zobrist[target]
+            seen_key = new_box_hash ^ player_zobrist[neighbours[d ^ 1][target]]
+            if best_seen is not None and g + steps >= best_seen.get(seen_key, INF):
+                continue
+            specs.append((i, b, d, target, new_box_hash, steps, seen_key))
+
+        children = heuristic.children(entry, [(s[4], s[1], s[3]) for s in specs])
+        push_candidates = []
+        for (i, b, d, target, new_box_hash, steps, seen_key), child in zip(specs, children):
+            new_h = child[0]
+            if new_h >= INF:
+                continue
+            new_boxes = boxes[:i] + (target,) + boxes[i + 1:]
+            push_candidates.append((new_h - cur_h, new_h, b, d, steps, new_boxes, new_box_hash))
+            if best_seen is not None and record:
+                best_seen[seen_key] = g + steps
+
+        push_candidates.sort(key=lambda x: x[0])
+        return [c[1:] for c in push_candidates]
+
+def reconstruct(board, pushes, start_boxes, start_player):
+    # Walking segments are only rebuilt here, for the pushes on the final path.
+    neighbours = board.neighbours
+    box_occ = bytearray(board.size + 1)
+    for b in start_boxes:
+        box_occ[b] = 1
+    player = start_player
+    full_moves = []
+    for box, d in pushes:
+        full_moves.extend(bfs_player_path(board, player, neighbours[d ^ 1][box], box_occ))
+        full_moves.append(DIRS[d][2])
+        box_occ[box] = 0
+        box_occ[neighbours[d][box]] = 1
+        player = box
+    return full_moves
+
+def astar_push_move_optimal_improved(walls, goals, start_boxes, start_player, max_expansions=2_000_000,
+                                     cache_size=200_000, cache_bytes=None, use_numpy=None, time_limit=None,
+                                     config=None, patterns_path=None, progress=None):
+    # patterns_path: JSON file of learned deadlock patterns for this level,
+    # loaded before and saved after the search (implies learning).
+    # progress(stats) is called every PROGRESS_EVERY expansions with
+    # {"expansions", "open", "elapsed"}; a true return value cancels the
+    # search, which then returns None. A search that gives up (budget, time
+    # limit or no solution) makes one last call with "final" set, so callers
+    # still learn how much work it did.
+    board = Board(walls, goals, set(start_boxes) | {start_player})
+    patterns = DeadlockPatterns(board).load(patterns_path) if patterns_path else None
+    try:
+        return astar_search(board, [board.index(b) for b in start_boxes], board.index(start_player),
+                            max_expansions=max_expansions, cache_size=cache_size, cache_bytes=cache_bytes,
+                            use_numpy=use_numpy, time_limit=time_limit, config=config, patterns=patterns,
+                            progress=progress)
+    finally:
+        if patterns is not None:
+            patterns.save(patterns_path)
+
+def astar_search(board, start_boxes, start_player, max_expansions=2_000_000,
+                 cache_size=200_000, cache_bytes=None, use_numpy=None, time_limit=None, config=None,
+                 patterns=None, progress=None):
+    bgoals = board.goals
+    player_zobrist = board.player_zobrist
+    if config is None:
+        config = SolverConfig()
+    weight = config.weight
+
+    # g counts pushes. A state is its box layout plus the player's reachable
+    # area, keyed by the Zobrist hash of the boxes xor the area's canonical
+    # (minimum) cell, so player positions inside one area collapse into one
+    # state. The area is only known once a state is flood-filled, so open
+    # entries are bare NodeTable indices (whose box cell is the raw player
+    # cell), the layout is replayed from the node's pushes on pop, and the
+    # closed check happens then. A fractional weighted f is rounded up to
+    # pick its bucket.
+    start_boxes = tuple(start_boxes)
+    start_hash = board.box_hash(start_boxes)
+    t0 = time.monotonic()
+    deadline = t0 + time_limit if time_limit is not None else None
+
+    pq = BucketQueue()
+    heuristic = make_heuristic(board, len(start_boxes), cache_size, cache_bytes, use_numpy)
+    start_h = heuristic.lookup(start_hash, start_boxes)[0]
+    if start_h >= INF:
+        return None
+    nodes = NodeTable()
+    node_box = nodes.box
+    root = nodes.add(-1, start_player, 0, 0)
+    pq.push(math.ceil(weight * start_h), 0, root)
+
+    expander = Expander(board, heuristic, config, patterns)
+    seen = SeenStates(nodes)
+    seen.add(start_hash ^ player_zobrist[start_player], root)
+    expansions = 0
+
+    while pq:
+        g, node = pq.pop()
+        if seen.is_superseded(node):
+            continue
+        boxes, box_hash = nodes.layout(board, node, start_boxes, start_hash)
+
+        canon = expander.enter(boxes, node_box[node])
+        if not seen.close(box_hash ^ player_zobrist[canon], node):
+            expander.leave(boxes)
+            continue
+
+        if all(bgoals[b] for b in boxes):
+            full_moves = reconstruct(board, nodes.pushes(node), start_boxes, start_player)
+            result = {"moves": full_moves, "expansions": expansions, "g": g, "open": len(pq),
+                      "cache": heuristic.cache.stats(), "config": config.name}
+            if expander.patterns is not None:
+                result["patterns"] = expander.patterns.stats()
+            return result
+
+        if expansions >= max_expansions:
+            break
+        if deadline is not None and not expansions & 255 and time.monotonic() > deadline:
+            break
+        expansions += 1
+        if progress is not None and not expansions % PROGRESS_EVERY:
+            if progress({"expansions": expansions, "open": len(pq), "elapsed": time.monotonic() - t0}):
+                return None
+
+        for h, b, d, steps, new_boxes, new_box_hash in expander.children(boxes, box_hash, g, seen, record=False):
+            new_g = g + steps
+            run = push_run(board, b, d, steps)
+            child = nodes.add_run(node, run, new_g)
+            seen.add(new_box_hash ^ player_zobrist[run[-1][0]], child)
+            pq.push(math.ceil(new_g + weight * h), new_g, child)
+        expander.leave(boxes)
+
+    if progress is not None:
+        progress({"expansions": expansions, "open": len(pq), "elapsed": time.monotonic() - t0, "final": True})
+    return None
+
+ANYTIME_WEIGHTS = (5, 2.5, 1.5, 1)
+
+def anytime_push_search(walls, goals, start_boxes, start_player, time_limit=None, on_solution=None,
+                        weights=ANYTIME_WEIGHTS, max_expansions=2_000_000, cache_size=200_000, cache_bytes=None,
+                        use_numpy=None, config=None, progress=None):
+    board = Board(walls, goals, set(start_boxes) | {start_player})
+    return anytime_search(board, [board.index(b) for b in start_boxes], board.index(start_player),
+                          time_limit=time_limit, on_solution=on_solution, weights=weights,
+                          max_expansions=max_expansions, cache_size=cache_size, cache_bytes=cache_bytes,
+                          use_numpy=use_numpy, config=config, progress=progress)
+
+def anytime_search(board, start_boxes, start_player, time_limit=None, on_solution=None, weights=ANYTIME_WEIGHTS,
+                   max_expansions=2_000_000, cache_size=200_000, cache_bytes=None, use_numpy=None, config=None,
+                   progress=None):
+    # Anytime weighted A*: search on f = g + w * h with the first weight, and
+    # each time a solution with fewer pushes turns up, report it through
+    # on_solution(result), step to the next weight and re-key the open list.
+    # States whose g + h cannot beat the incumbent are dropped and closed
+    # states are reopened on a better g, so once the open list runs dry (or,
+    # at weight 1, its best f reaches the incumbent) the last solution is
+    # push-optimal. Returns the best result found by the budget, with
+    # result["optimal"] telling whether that was proven. progress works as in
+    # astar_search; returning True stops the search with the best so far.
+    if config is None:
+        config = SolverConfig()
+    bgoals = board.goals
+    player_zobrist = board.player_zobrist
+    start_boxes = tuple(start_boxes)
+    t0 = time.monotonic()
+    deadline = t0 + time_limit if time_limit is not None else None
+
+    heuristic = make_heuristic(board, len(start_boxes), cache_size, cache_bytes, use_numpy)
+    expander = Expander(board, heuristic, config)
+    start_hash = board.box_hash(start_boxes)
+    start_h = heuristic.lookup(start_hash, start_boxes)[0]
+    if start_h >= INF:
+        return None
+
+    schedule = list(weights) or [1]
+    weight = schedule.pop(0)
+    nodes = NodeTable()
+    node_box = nodes.box
+    pq = [(weight * start_h, 0, start_h, nodes.add(-1, start_player, 0, 0), start_hash, start_boxes)]
+    closed = {}
+    best_seen = {start_hash ^ player_zobrist[start_player]: 0}
+    incumbent = INF
+    best = None
+    expansions = 0
+
+    while pq:
+        f, g, h, node, box_hash, boxes = pq[0]
+        if g + h >= incumbent:
+            heapq.heappop(pq)
+            continue
+        if weight == 1 and f >= incumbent:
+            break
+        heapq.heappop(pq)
+
+        canon = expander.enter(boxes, node_box[node])
+        key = box_hash ^ player_zobrist[canon]
+        if closed.get(key, INF) <= g:
+            expander.leave(boxes)
+            continue
+        closed[key] = g
+
+        if all(bgoals[b] for b in boxes):
+            expander.leave(boxes)
+            incumbent = g
+            best = {"moves": reconstruct(board, nodes.pushes(node), start_boxes, start_player),
+                    "expansions": expansions, "g": g, "weight": weight, "optimal": False,
+                    "elapsed": time.monotonic() - t0, "config": config.name}
+            if on_solution is not None:
+                on_solution(best)
+            if schedule:
+                weight = schedule.pop(0)
+            pq = [(e[1] + weight * e[2],) + e[1:] for e in pq if e[1] + e[2] < incumbent]
+            heapq.heapify(pq)
+            continue
+
+        expansions += 1
+        if expansions > max_expansions:
+            return best
+        if deadline is not None and not expansions & 255 and time.monotonic() > deadline:
+            return best
+        if progress is not None and not expansions % PROGRESS_EVERY:
+            if progress({"expansions": expansions, "open": len(pq), "elapsed": time.monotonic() - t0}):
+                return best
+
+        for h, b, d, steps, new_boxes, new_box_hash in expander.children(boxes, box_hash, g, best_seen):
+            new_g = g + steps
+            if new_g + h >= incumbent:
+                continue
+            heapq.heappush(pq, (new_g + weight * h, new_g, h, nodes.add_run(node, push_run(board, b, d, steps), new_g),
+                                new_box_hash, new_boxes))
+        expander.leave(boxes)
+
+    if best is not None:
+        # strong_deadlock may have pruned the optimal line, so no proof then.
+        best["optimal"] = not config.strong_deadlock
+        best["expansions"] = expansions
+        best["cache"] = heuristic.cache.stats()
+    return best
+
+class TranspositionTable:
+    # Fixed-size table of (key, g, iteration) in flat arrays: `size` slots,
+    # rounded up to a power of two and grouped in two-way buckets. A state
+    # already searched in this iteration at a g no larger than now is pruned.
+    # On a collision, the entry with the higher g (smaller subtree) or from an
+    # older iteration is replaced.
+    __slots__ = ("mask", "keys", "g", "stamp", "iteration", "stores", "replacements")
+
+    def __init__(self, size=1 << 20):
+        size = 1 << max(1, (size - 1).bit_length())
+        self.mask = size - 2
+        self.keys = array("Q", bytes(8 * size))
+        self.g = array("i", bytes(4 * size))
+        self.stamp = array("i", bytes(4 * size))
+        self.iteration = 0
+        self.stores = 0
+        self.replacements = 0
+
+    def new_iteration(self):
+        self.iteration += 1
+
+    def visit(self, key, g):
+        # True if the state can be pruned; otherwise records it and returns False.
+        keys, gs, stamp, it = self.keys, self.g, self.stamp, self.iteration
+        slot = (key >> 7) & self.mask
+        for s in (slot, slot + 1):
+            if keys[s] == key and stamp[s] == it:
+                if gs[s] <= g:
+                    return True
+                gs[s] = g
+                return False
+        victim = slot
+        for s in (slot, slot + 1):
+            if stamp[s] != it:
+                victim = s
+                break
+        else:
+            victim = slot if gs[slot] >= gs[slot + 1] else slot + 1
+            if gs[victim] < g:
+                return False
+            self.replacements += 1
+        keys[victim] = key
+        gs[victim] = g
+        stamp[victim] = it
+        self.stores += 1
+        return False
+
+    def stats(self):
+        return {"slots": len(self.keys), "stores": self.stores, "replacements": self.replacements}
+
+def ida_push_optimal(walls, goals, start_boxes, start_player, max_expansions=2_000_000, table_size=1 << 20,
+                     cache_size=200_000, cache_bytes=None, use_numpy=None, time_limit=None, config=None):
+    board = Board(walls, goals, set(start_boxes) | {start_player})
+    return ida_search(board, [board.index(b) for b in start_boxes], board.index(start_player),
+                      max_expansions=max_expansions, table_size=table_size, cache_size=cache_size,
+                      cache_bytes=cache_bytes, use_numpy=use_numpy, time_limit=time_limit, config=config)
+
+def ida_search(board, start_boxes, start_player, max_expansions=2_000_000, table_size=1 << 20,
+               cache_size=200_000, cache_bytes=None, use_numpy=None, time_limit=None, config=None):
+    # Iterative-deepening A* on f = g + weight * h. Memory is the DFS path, the
+    # fixed TranspositionTable and the bounded heuristic memo, whatever the
+    # number of states visited; the price is re-expanding states each iteration.
+    if config is None:
+        config = SolverConfig()
+    weight = config.weight
+    bgoals = board.goals
+    player_zobrist = board.player_zobrist
+    start_boxes = tuple(start_boxes)
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+
+    heuristic = make_heuristic(board, len(start_boxes), cache_size, cache_bytes, use_numpy)
+    expander = Expander(board, heuristic, config)
+    table = TranspositionTable(table_size)
+    start_hash = board.box_hash(start_boxes)
+    start_h = heuristic.lookup(start_hash, start_boxes)[0]
+    if start_h >= INF:
+        return None
+
+    def open_state(boxes, box_hash, player, g):
+        # Children of a state, or None if the table prunes it, or True at a goal.
+        canon = expander.enter(boxes, player)
+        try:
+            if table.visit(box_hash ^ player_zobrist[canon], g):
+                return None
+            if all(bgoals[b] for b in boxes):
+                return True
+            return expander.children(boxes, box_hash, g)
+        finally:
+            expander.leave(boxes)
+
+    expansions = 0
+    bound = weight * start_h
+    while bound < INF:
+        table.new_iteration()
+        next_bound = INF
+        pushes = []
+        root = open_state(start_boxes, start_hash, start_player, 0)
+        if root is True:
+            return {"moves": [], "expansions": expansions, "g": 0, "table": table.stats(),
+                    "cache": heuristic.cache.stats(), "config": config.name}
+        # Frames are [children, next child index, g, pushes on entry].
+        stack = [[root, 0, 0, 0]]
+        while stack:
+            frame = stack[-1]
+            children, idx, g, depth = frame
+            if idx == len(children):
+                stack.pop()
+                del pushes[depth:]
+                continue
+            frame[1] = idx + 1
+            h, b, d, steps, new_boxes, new_box_hash = children[idx]
+            g += steps
+            f = g + weight * h
+            if f > bound:
+                if f < next_bound:
+                    next_bound = f
+                continue
+
+            expansions += 1
+            if expansions > max_expansions:
+                return None
+            if deadline is not None and not expansions & 255 and time.monotonic() > deadline:
+                return None
+
+            depth = len(pushes)
+            pushes.extend(push_run(board, b, d, steps))
+            child = open_state(new_boxes, new_box_hash, pushes[-1][0], g)
+            if child is True:
+                full_moves = reconstruct(board, pushes, start_boxes, start_player)
+                return {"moves": full_moves, "expansions": expansions, "g": g, "table": table.stats(),
+                        "cache": heuristic.cache.stats(), "config": config.name}
+            if child is None:
+                del pushes[depth:]
+                continue
+            stack.append([child, 0, g, depth])
+        bound = next_bound
+    return None
+
+def compute_reach_distances(board, sources):
+    # reach[cell][i]: fewest pushes that can take a box from sources[i] to
+    # `cell` on the empty board (forward BFS, the pusher needs a free cell
+    # behind the box); the start-side counterpart of compute_push_distances.
+    walls = board.walls
+    neighbours = board.neighbours
+    reach = [[INF] * len(sources) for _ in range(board.size + 1)]
+    for i, s in enumerate(sources):
+        reach[s][i] = 0
+        q = deque([s])
+        while q:
+            cur = q.popleft()
+            nd = reach[cur][i] + 1
+            for d, table in enumerate(neighbours):
+                nxt = table[cur]
+                if walls[nxt] or walls[neighbours[d ^ 1][cur]] or reach[nxt][i] != INF:
+                    continue
+                reach[nxt][i] = nd
+                q.append(nxt)
+    return reach
+
+class PullTargets:
+    # Stands in for the Board in an AssignmentCache so it bounds the pulls left
+    # to bring boxes back to their start cells: the start cells play the goals.
+    __slots__ = ("goal_cells", "push_dist")
+
+    def __init__(self, board, start_boxes):
+        self.goal_cells = tuple(start_boxes)
+        self.push_dist = compute_reach_distances(board, self.goal_cells)
+
+def legal_pulls(board, boxes, mark, stamp):
+    # The player stands next to box b on side e and steps back to the cell
+    # beyond, dragging the box one cell: (i, b, e, box_to, player_to).
+    neighbours = board.neighbours
+    out = []
+    for i, b in enumerate(boxes):
+        for e in range(4):
+            box_to = neighbours[e][b]
+            player_to = neighbours[e][box_to]
+            if mark[box_to] != stamp or mark[player_to] != stamp:
+                continue
+            out.append((i, b, e, box_to, player_to))
+    return out
+
+def box_areas(board, boxes, box_occ, mark, stamp):
+    # Canonical cells of the player areas touching one of `boxes` (already set
+    # in box_occ): every place the player can be while able to push.
+    neighbours = board.neighbours
+    walls = board.walls
+    areas = []
+    for b in boxes:
+        for table in neighbours:
+            cell = table[b]
+            if walls[cell] or box_occ[cell] or mark[cell] == stamp:
+                continue
+            areas.append(reachable_area(board, cell, box_occ, mark, stamp))
+    return areas
+
+def bidirectional_push_optimal(walls, goals, start_boxes, start_player, max_expansions=2_000_000,
+                               cache_size=200_000, cache_bytes=None, use_numpy=None, time_limit=None,
+                               config=None):
+    board = Board(walls, goals, set(start_boxes) | {start_player})
+    return bidirectional_search(board, [board.index(b) for b in start_boxes], board.index(start_player),
+                                max_expansions=max_expansions, cache_size=cache_size, cache_bytes=cache_bytes,
+                                use_numpy=use_numpy, time_limit=time_limit, config=config)
+
+def bidirectional_search(board, start_boxes, start_player, max_expansions=2_000_000,
+                         cache_size=200_000, cache_bytes=None, use_numpy=None, time_limit=None, config=None):
+    # Forward push A* against a reverse pull A* started from the goal layout
+    # with every player area around it. Both sides close states on the same
+    # (box hash ^ canonical area cell) key; mu is the cheapest meeting found.
+    # With consistent bounds on both sides, mu is optimal once it is no larger
+    # than the bigger of the two open-list minima.
+    start_boxes = tuple(start_boxes)
+    if len(start_boxes) != len(board.goal_cells):
+        return astar_search(board, start_boxes, start_player, max_expansions=max_expansions,
+                            cache_size=cache_size, cache_bytes=cache_bytes, use_numpy=use_numpy,
+                            time_limit=time_limit, config=config)
+    if config is None:
+        config = SolverConfig()
+    weight = config.weight
+    bgoals = board.goals
+    neighbours = board.neighbours
+    box_zobrist, player_zobrist = board.box_zobrist, board.player_zobrist
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+
+    fwd_heuristic = make_heuristic(board, len(start_boxes), cache_size, cache_bytes, use_numpy)
+    bwd_heuristic = AssignmentCache(PullTargets(board, start_boxes), cache_size, cache_bytes)
+    fwd = Expander(board, fwd_heuristic, config)
+    bwd = Expander(board, bwd_heuristic, config)
+
+    # Forward nodes hold the raw player cell in `box` (NodeTable convention).
+    # Backward nodes hold the player's cell after the pull in `box` and the
+    # pull side in `dir`, so the pulled box sits on neighbours[dir ^ 1][box];
+    # backward roots have parent -1.
+    fwd_nodes, bwd_nodes = NodeTable(), NodeTable()
+    fwd_closed, bwd_closed = {}, {}
+    fwd_seen, bwd_seen = {}, {}
+    fwd_pq, bwd_pq = [], []
+
+    start_hash = board.box_hash(start_boxes)
+    start_h = fwd_heuristic.lookup(start_hash, start_boxes)[0]
+    if start_h >= INF:
+        return None
+    heapq.heappush(fwd_pq, (weight * start_h, 0, fwd_nodes.add(-1, start_player, 0, 0), start_hash, start_boxes))
+    fwd_seen[start_hash ^ player_zobrist[start_player]] = 0
+
+    goal_boxes = board.goal_cells
+    goal_hash = board.box_hash(goal_boxes)
+    goal_h = bwd_heuristic.lookup(goal_hash, goal_boxes)[0]
+    if goal_h >= INF:
+        return None
+    for b in goal_boxes:
+        bwd.box_occ[b] = 1
+    bwd.stamp += 1
+    for canon in box_areas(board, goal_boxes, bwd.box_occ, bwd.mark, bwd.stamp):
+        heapq.heappush(bwd_pq, (weight * goal_h, 0, bwd_nodes.add(-1, canon, 0, 0), goal_hash, goal_boxes))
+        bwd_seen[goal_hash ^ player_zobrist[canon]] = 0
+    bwd.leave(goal_boxes)
+
+    mu = INF
+    meet = None
+    expansions = 0
+    while fwd_pq and bwd_pq:
+        if mu <= max(fwd_pq[0][0], bwd_pq[0][0]):
+            break
+        expansions += 1
+        if expansions > max_expansions:
+            return None
+        if deadline is not None and not expansions & 255 and time.monotonic() > deadline:
+            return None
+
+        forward = len(fwd_pq) <= len(bwd_pq)
+        if forward:
+            f, g, node, box_hash, boxes = heapq.heappop(fwd_pq)
+            canon = fwd.enter(boxes, fwd_nodes.box[node])
+            key = box_hash ^ player_zobrist[canon]
+            if key in fwd_closed:
+                fwd.leave(boxes)
+                continue
+            fwd_closed[key] = (g, node)
+            other = bwd_closed.get(key)
+            if other is not None and g + other[0] < mu:
+                mu, meet = g + other[0], (node, other[1])
+            if all(bgoals[b] for b in boxes):
+                # A goal layout is a backward root at cost 0, popped or not.
+                if g < mu:
+                    mu, meet = g, (node, None)
+                fwd.leave(boxes)
+                continue
+            for h, b, d, steps, new_boxes, new_box_hash in fwd.children(boxes, box_hash, g, fwd_seen):
+                new_g = g + steps
+                heapq.heappush(fwd_pq, (new_g + weight * h, new_g,
+                                        fwd_nodes.add_run(node, push_run(board, b, d, steps), new_g),
+                                        new_box_hash, new_boxes))
+            fwd.leave(boxes)
+        else:
+            f, g, node, box_hash, boxes = heapq.heappop(bwd_pq)
+            canon = bwd.enter(boxes, bwd_nodes.box[node])
+            key = box_hash ^ player_zobrist[canon]
+            if key in bwd_closed:
+                bwd.leave(boxes)
+                continue
+            bwd_closed[key] = (g, node)
+            other = fwd_closed.get(key)
+            if other is not None and g + other[0] < mu:
+                mu, meet = g + other[0], (other[1], node)
+            tentative_g = g + 1
+            entry = bwd_heuristic.lookup(box_hash, boxes)
+            specs = []
+            for i, b, e, box_to, player_to in legal_pulls(board, boxes, bwd.mark, bwd.stamp):
+                new_box_hash = box_hash ^ box_zobrist[b] ^ box_zobrist[box_to]
+                seen_key = new_box_hash ^ player_zobrist[player_to]
+                if tentative_g >= bwd_seen.get(seen_key, INF):
+                    continue
+                bwd_seen[seen_key] = tentative_g
+                specs.append((i, e, box_to, player_to, new_box_hash, b))
+            children = bwd_heuristic.children(entry, [(s[4], s[5], s[2]) for s in specs])
+            for (i, e, box_to, player_to, new_box_hash, _), child in zip(specs, children):
+                if child[0] >= INF:
+                    continue
+                heapq.heappush(bwd_pq, (tentative_g + weight * child[0], tentative_g,
+                                        bwd_nodes.add(node, player_to, e, tentative_g), new_box_hash,
+                                        boxes[:i] + (box_to,) + boxes[i + 1:]))
+            bwd.leave(boxes)
+
+    if meet is None:
+        return None
+    fwd_node, bwd_node = meet
+    pushes = fwd_nodes.pushes(fwd_node)
+    # Undo the pull chain from the meeting state back to the goal layout: the
+    # pull on side e that left the box on c is a push of c in direction e ^ 1.
+    node = bwd_node
+    while node is not None and bwd_nodes.parent[node] >= 0:
+        e = bwd_nodes.dir[node]
+        pushes.append((neighbours[e ^ 1][bwd_nodes.box[node]], e ^ 1))
+        node = bwd_nodes.parent[node]
+    full_moves = reconstruct(board, pushes, start_boxes, start_player)
+    return {"moves": full_moves, "expansions": expansions, "g": mu,
+            "cache": fwd_heuristic.cache.stats(), "config": config.name}
+
+def clear_console():
+    os.system("cls" if os.name == "nt" else "clear")
+
+def animate_solution(level_lines, walls, goals, boxes, player, moves, delay=0.2):
+    cur_boxes = set(boxes)
+    cur_player = player
+    rows = len(level_lines)
+    cols = max(len(r) for r in level_lines)
+    step = 0
+    for m in moves:
+        dr, dc = DIR_MAP[m]
+        next_pos = (cur_player[0] + dr, cur_player[1] + dc)
+        if next_pos in cur_boxes:
+            box_dest = (next_pos[0] + dr, next_pos[1] + dc)
+            if box_dest in walls or box_dest in cur_boxes:
+                print("Illegal push detected during animation; aborting.")
+                return
+            cur_boxes.remove(next_pos)
+            cur_boxes.add(box_dest)
+        cur_player = next_pos
+        step += 1
+
+        clear_console()
+        print(f"Step {step}: Move {m} | Player {cur_player} | Boxes {sorted(cur_boxes)}")
+        for r in range(rows):
+            line = ""
+            for c in range(cols):
+                pos = (r, c)
+                if pos in walls:
+                    line += "#"
+                elif pos == cur_player:
+                    line += "@"
+                elif pos in cur_boxes and pos in goals:
+                    line += "*"
+                elif pos in cur_boxes:
+                    line += "$"
+                elif pos in goals:
+                    line += "."
+                else:
+                    line += " "
+            print(line)
+        try:
+            time.sleep(delay)
+        except Exception:
+            pass
+    print("solved.")
+
+if __name__== "__main__":
+    level = [
+        "#########",
+        "#   .   #",
+        "# $ # $ #",
+        "#   @ . #",
+        "# $ # $ #",
+        "#   . . #",
+        "#########"
+    ]
+
+    walls, goals, boxes, player = parse_level(level)
+    print("Parsed map:")
+    print_map(level, walls, goals, boxes, player)
+    print()
+
+    t0 = time.time()
+    result = astar_push_move_optimal_improved(walls, goals, boxes, player, max_expansions=2_000_000)
+    t1 = time.time()
+
+    if result is None:
+        print("No solution found (or exceeded max expansions).")
+        sys.exit(1)
+
+    print("Solution found!")
+    print("Expansions:", result["expansions"])
+    print("Total pushes (g):", result["g"])
+    print("Move sequence (length):", len(result["moves"]))
+    print("Move sequence (U/D/L/R):")
+    print("".join(result["moves"]))
+    print("\nsolving...")
+    animate_solution(level, walls, goals, boxes, player, result["moves"], delay=0.2)
@@ -0,0 +1,34 @@
+import json
+import os
+
+from sokoban_levels import LevelCollection
+from sokoban_solverf import SolverConfig, astar_push_move_optimal_improved
+
+BENCH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels", "bench.xsb")
+
+def load(name):
+    with LevelCollection(BENCH) as levels:
+        names = [levels.name(i) for i in range(len(levels))]
+        return levels.parsed(names.index(name))
+
+def test_warm_start_runs_fewer_sub_searches(tmp_path):
+    walls, goals, boxes, player = load("Rooms")
+    path = str(tmp_path / "rooms.json")
+    config = SolverConfig(learn_deadlocks=True)
+    plain = astar_push_move_optimal_improved(walls, goals, boxes, player)
+    cold = astar_push_move_optimal_improved(walls, goals, boxes, player, config=config, patterns_path=path)
+    warm = astar_push_move_optimal_improved(walls, goals, boxes, player, config=config, patterns_path=path)
+    assert plain["g"] == cold["g"] == warm["g"]
+    assert cold["patterns"]["searches"] > 0
+    assert warm["patterns"]["searches"] < cold["patterns"]["searches"]
+    with open(path, encoding="utf-8") as fh:
+        assert json.load(fh)["cleared"]
+
+def test_sub_search_budget():
+    # Sub-search states stay within budget per push checked, plus the one
+    # search that may overshoot it. Unbudgeted, Rooms spends ~14k states.
+    walls, goals, boxes, player = load("Rooms")
+    result = astar_push_move_optimal_improved(walls, goals, boxes, player,
+                                              config=SolverConfig(learn_deadlocks=True))
+    stats = result["patterns"]
+    assert stats["search_states"] <= 0.5 * stats["checks"] + 401
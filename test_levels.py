@@ -0,0 +1,65 @@
+from sokoban_levels import LevelCollection
+
+# A collection in the SOK layout: notes (Title, Author, Comment blocks) sit
+# directly under each board, a plain line above a board may name it, and the
+# file starts with a collection header.
+SOK_FILE = """\
+Sample Collection
+Author: Collection Author
+Comment:
+Three levels in SOK layout.
+
+Title: not a level title, it is inside a comment block
+Comment-End:
+
+1
+#####
+#@$.#
+#####
+Title: First
+Author: someone
+
+2
+######
+#@ $.#
+######
+Title: Second
+Author: someone
+Comment:
+A longer note
+
+with a blank line.
+Comment-End:
+
+######
+#.$ @#
+######
+Author: someone
+
+; Fourth
+#####
+#.$@#
+#####
+Author: someone
+
+Title: Fifth
+#####
+#@$.#
+#####
+"""
+
+def test_sok_names(tmp_path):
+    path = tmp_path / "sample.sok"
+    path.write_text(SOK_FILE, encoding="utf-8")
+    with LevelCollection(str(path)) as levels:
+        assert [levels.name(i) for i in range(len(levels))] == ["First", "Second", "sample.sok#3", "Fourth", "Fifth"]
+        assert levels[1] == ["######", "#@ $.#", "######"]
+        walls, goals, boxes, player = levels.parsed(2)
+        assert player == (1, 4) and boxes == {(1, 2)} and goals == {(1, 1)}
+
+def test_crlf_and_no_trailing_newline(tmp_path):
+    path = tmp_path / "crlf.xsb"
+    path.write_bytes(b"#####\r\n#@$.#\r\n#####\r\nTitle: Only\r\nAuthor: someone")
+    with LevelCollection(str(path)) as levels:
+        assert [levels.name(i) for i in range(len(levels))] == ["Only"]
+        assert levels[0] == ["#####", "#@$.#", "#####"]
@@ -0,0 +1,127 @@
+import random
+from collections import deque
+
+import pytest
+
+from sokoban_solverf import (DIR_MAP, parse_level, astar_push_move_optimal_improved, anytime_push_search,
+                             bidirectional_push_optimal, ida_push_optimal)
+from sokoban_parallel import hda_star_push_optimal
+
+# Cross-check of every push-optimal search against a brute-force BFS over
+# (box layout, player area) on small seeded random levels: push counts must
+# match, unsolvable levels must stay unsolved, and the moves must replay.
+
+SOLVABLE_SEEDS = range(40)
+UNSOLVABLE_SEEDS = range(10)
+BFS_LIMIT = 200_000
+STEPS = tuple(DIR_MAP.values())
+
+def random_level(rng):
+    rows, cols = rng.randint(5, 8), rng.randint(5, 9)
+    grid = [["#"] * cols for _ in range(rows)]
+    for r in range(1, rows - 1):
+        for c in range(1, cols - 1):
+            grid[r][c] = " " if rng.random() > 0.22 else "#"
+    free = [(r, c) for r in range(rows) for c in range(cols) if grid[r][c] == " "]
+    n = rng.randint(1, 4)
+    if len(free) < 2 * n + 1:
+        return None
+    cells = rng.sample(free, 2 * n + 1)
+    for r, c in cells[:n]:
+        grid[r][c] = "$"
+    for r, c in cells[n:2 * n]:
+        grid[r][c] = "."
+    r, c = cells[-1]
+    grid[r][c] = "@"
+    return ["".join(row) for row in grid]
+
+def player_area(player, walls, boxes):
+    seen = {player}
+    stack = [player]
+    while stack:
+        r, c = stack.pop()
+        for dr, dc in STEPS:
+            nxt = (r + dr, c + dc)
+            if nxt not in seen and nxt not in walls and nxt not in boxes:
+                seen.add(nxt)
+                stack.append(nxt)
+    return seen
+
+def bfs_pushes(walls, goals, boxes, player):
+    # Fewest pushes, None if unsolvable, "limit" past BFS_LIMIT states.
+    boxes = frozenset(boxes)
+    seen = {(boxes, min(player_area(player, walls, boxes)))}
+    todo = deque([(boxes, player, 0)])
+    while todo:
+        boxes, player, pushes = todo.popleft()
+        if boxes <= goals:
+            return pushes
+        area = player_area(player, walls, boxes)
+        for r, c in boxes:
+            for dr, dc in STEPS:
+                target = (r + dr, c + dc)
+                if (r - dr, c - dc) not in area or target in walls or target in boxes:
+                    continue
+                pushed = (boxes - {(r, c)}) | {target}
+                key = (pushed, min(player_area((r, c), walls, pushed)))
+                if key not in seen:
+                    seen.add(key)
+                    todo.append((pushed, (r, c), pushes + 1))
+                    if len(seen) > BFS_LIMIT:
+                        return "limit"
+    return None
+
+def replay(walls, goals, boxes, player, moves):
+    # Number of pushes in moves; fails unless every move is legal and the
+    # level ends solved.
+    boxes = set(boxes)
+    pushes = 0
+    for mv in moves:
+        dr, dc = DIR_MAP[mv]
+        nxt = (player[0] + dr, player[1] + dc)
+        assert nxt not in walls
+        if nxt in boxes:
+            target = (nxt[0] + dr, nxt[1] + dc)
+            assert target not in walls and target not in boxes
+            boxes.remove(nxt)
+            boxes.add(target)
+            pushes += 1
+        player = nxt
+    assert boxes <= goals
+    return pushes
+
+SOLVERS = {
+    "astar": astar_push_move_optimal_improved,
+    "ida": ida_push_optimal,
+    "bidirectional": bidirectional_push_optimal,
+    "anytime": anytime_push_search,
+    "hda": lambda *level, **kw: hda_star_push_optimal(*level, workers=2, **kw),
+}
+
+@pytest.fixture(scope="module", params=[(seed, True) for seed in SOLVABLE_SEEDS]
+                                      + [(seed, False) for seed in UNSOLVABLE_SEEDS],
+                ids=lambda p: f"{'solvable' if p[1] else 'unsolvable'}-{p[0]}")
+def level(request):
+    # Most random levels are unsolvable, so draw until one of the wanted kind
+    # turns up within the BFS limit.
+    seed, solvable = request.param
+    rng = random.Random(seed)
+    while True:
+        lines = random_level(rng)
+        if lines is None:
+            continue
+        walls, goals, boxes, player = parse_level(lines)
+        expected = bfs_pushes(walls, goals, boxes, player)
+        if expected != "limit" and (expected is not None) == solvable:
+            return (walls, goals, boxes, player), expected
+
+@pytest.mark.parametrize("solver", SOLVERS)
+def test_push_count_matches_bfs(solver, level):
+    (walls, goals, boxes, player), expected = level
+    result = SOLVERS[solver](walls, goals, boxes, player, max_expansions=1_000_000)
+    if expected is None:
+        assert result is None
+        return
+    assert result is not None
+    assert result["g"] == expected
+    assert replay(walls, goals, boxes, player, result["moves"]) == expected